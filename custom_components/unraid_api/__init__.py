@@ -8,20 +8,26 @@ from typing import TYPE_CHECKING
 
 from aiohttp import ClientConnectionError, ClientConnectorSSLError
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_VERIFY_SSL
+from homeassistant.const import CONF_HOST
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryError, ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity import DeviceInfo
 
-from .api import IncompatibleApiError, UnraidAuthError, UnraidGraphQLError, get_api_client
-from .const import DOMAIN, PLATFORMS
-from .coordinator import UnraidDataUpdateCoordinator
+from .api import IncompatibleApiError, UnraidAuthError, UnraidGraphQLError
+from .const import CONF_LIVE_METRICS, DOMAIN, PLATFORMS
+from .coordinator import UnraidDataUpdateCoordinator, snapshot_store
+from .services import async_setup_services
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
+
+    from .models import ServerInfo
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 
 @dataclass
 class UnraidData:
@@ -34,20 +40,46 @@ class UnraidData:
 type UnraidConfigEntry = ConfigEntry[UnraidData]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Set up the services of the integration."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: UnraidConfigEntry,
 ) -> bool:
     """Set up this integration using config entry."""
     _LOGGER.debug("Setting up %s", config_entry.data[CONF_HOST])
-    try:
-        api_client = await get_api_client(
-            host=config_entry.data[CONF_HOST],
-            api_key=config_entry.data[CONF_API_KEY],
-            session=async_get_clientsession(hass, config_entry.data[CONF_VERIFY_SSL]),
+    coordinator = UnraidDataUpdateCoordinator(hass, config_entry)
+    if (server_info := await coordinator.async_restore_snapshot()) is not None:
+        # Create the entities from the last known data, connect in the background
+        _LOGGER.debug("Restored snapshot of %s", server_info.name)
+        config_entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} {config_entry.title} refresh"
         )
+    else:
+        server_info = await async_connect(coordinator)
+        await coordinator.async_config_entry_first_refresh()
+
+    device_info = create_device_info(config_entry, server_info)
+    if config_entry.options.get(CONF_LIVE_METRICS, False):
+        coordinator.async_start_metrics_subscription()
 
-        server_info = await api_client.query_server_info()
+    config_entry.runtime_data = UnraidData(
+        coordinator,
+        device_info,
+    )
+
+    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    return True
+
+
+async def async_connect(coordinator: UnraidDataUpdateCoordinator) -> ServerInfo:
+    """Connect the coordinator to the server."""
+    try:
+        return await coordinator.async_connect()
     except ClientConnectorSSLError as exc:
         _LOGGER.debug("Init: SSL error: %s", str(exc))
         raise ConfigEntryError(translation_domain=DOMAIN, translation_key="ssl_error") from exc
@@ -78,6 +110,9 @@ async def async_setup_entry(
             translation_placeholders={"min_version": exc.min_version, "version": exc.version},
         ) from exc
 
+
+def create_device_info(config_entry: UnraidConfigEntry, server_info: ServerInfo) -> DeviceInfo:
+    """Create the device info of the server."""
     # Log the localurl value for debugging
     _LOGGER.debug(
         "Server info: name=%s, version=%s, localurl='%s'",
@@ -101,17 +136,7 @@ async def async_setup_entry(
             server_info.localurl,
         )
 
-    device_info = DeviceInfo(**device_info_kwargs)
-    coordinator = UnraidDataUpdateCoordinator(hass, config_entry, api_client)
-    await coordinator.async_config_entry_first_refresh()
-
-    config_entry.runtime_data = UnraidData(
-        coordinator,
-        device_info,
-    )
-
-    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
-    return True
+    return DeviceInfo(**device_info_kwargs)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: UnraidConfigEntry) -> bool:
@@ -119,3 +144,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: UnraidConfigEntry) -> b
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         del entry.runtime_data
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: UnraidConfigEntry) -> None:
+    """Remove the saved snapshot of a removed config entry."""
+    await snapshot_store(hass, entry.entry_id).async_remove()
@@ -3,28 +3,52 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import importlib
+import itertools
+import json
 import logging
+import sys
 from abc import abstractmethod
-from typing import TYPE_CHECKING, Any, TypeVar
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Literal, TypeVar, overload
 
+from aiohttp import ClientConnectionError, WSMsgType
 from awesomeversion import AwesomeVersion
 from pydantic import BaseModel, ValidationError
 
+from .instrumentation import ApiStats
+
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator, Collection, Mapping
+
     from aiohttp import ClientSession
 
     from unraid_api.models import (
         Array,
         Disk,
         DockerContainer,
+        DockerState,
         Metrics,
         ServerInfo,
         Share,
         VirtualMachine,
+        VmState,
     )
 
 _LOGGER = logging.getLogger(__name__)
 
+SUBSCRIPTION_PROTOCOL = "graphql-transport-ws"
+SUBSCRIPTION_ACK_TIMEOUT = 10
+# Close codes of the graphql-transport-ws protocol for rejected credentials
+SUBSCRIPTION_AUTH_CLOSE_CODES = (4401, 4403)
+
+# Requests with a lower priority start first
+PRIORITY_MUTATION = 0
+PRIORITY_QUERY = 1
+DEFAULT_MAX_IN_FLIGHT = 2
+
 
 class UnraidGraphQLError(Exception):
     """Raised when the response contains errors."""
@@ -48,63 +72,334 @@ class IncompatibleApiError(Exception):
         super().__init__(*args)
 
 
-def _import_client_class(
-    api_version: AwesomeVersion,
-) -> type[UnraidApiClient]:
-    if api_version >= AwesomeVersion("4.20.0"):
-        from custom_components.unraid_api.api.v4_20 import UnraidApiV420  # noqa: PLC0415
+# Module and name of the client class of each API version, newest first
+CLIENT_CLASSES = (
+    (AwesomeVersion("4.20.0"), "custom_components.unraid_api.api.v4_20", "UnraidApiV420"),
+)
+
+
+def _client_class_path(api_version: AwesomeVersion) -> tuple[str, str]:
+    for min_version, module, name in CLIENT_CLASSES:
+        if api_version >= min_version:
+            return module, name
+
+    raise IncompatibleApiError(version=api_version, min_version=CLIENT_CLASSES[-1][0])
 
-        return UnraidApiV420
 
-    raise IncompatibleApiError(version=api_version, min_version=AwesomeVersion("4.20.0"))
+def _import_client_class(module: str, name: str) -> type[UnraidApiClient]:
+    return getattr(importlib.import_module(module), name)
 
 
-async def get_api_client(host: str, api_key: str, session: ClientSession) -> UnraidApiClient:
-    """Get Unraid API Client."""
-    client = UnraidApiClient(host, api_key, session)
-    api_version = await client.query_api_version()
-    loop = asyncio.get_event_loop()
-    cls = await loop.run_in_executor(None, _import_client_class, api_version)
-    return cls(host, api_key, session)
+async def get_api_client(
+    host: str,
+    api_key: str,
+    session: ClientSession,
+    api_version: AwesomeVersion | None = None,
+) -> UnraidApiClient:
+    """
+    Get Unraid API Client.
+
+    The API version is queried from the server, unless a known version is passed.
+    """
+    if api_version is None:
+        api_version = await UnraidApiClient(host, api_key, session).query_api_version()
+    module, name = _client_class_path(api_version)
+    if module in sys.modules:
+        cls = _import_client_class(module, name)
+    else:
+        loop = asyncio.get_running_loop()
+        cls = await loop.run_in_executor(None, _import_client_class, module, name)
+    client = cls(host, api_key, session)
+    client.version = api_version
+    return client
 
 
 _T = TypeVar("_T", bound=BaseModel)
 
 
+class RequestScheduler:
+    """
+    Limit the requests in flight to a server.
+
+    Waiting requests start by priority, then in the order they were made.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> None:
+        self.in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._max_in_flight = max_in_flight
+
+    @property
+    def max_in_flight(self) -> int:
+        """Return the maximum number of requests in flight."""
+        return self._max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, value: int) -> None:
+        self._max_in_flight = value
+        # Start waiting requests in the slots a raised limit frees up
+        while self.in_flight < value and self._hand_over():
+            self.in_flight += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncGenerator[None]:
+        """Wait for a free slot and hold it while the context is active."""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # The slot may have been handed over just before the cancellation
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        # Hand the slot over unless a lowered limit drops it
+        if self.in_flight > self._max_in_flight or not self._hand_over():
+            self.in_flight -= 1
+
+    def _hand_over(self) -> bool:
+        # Wake the next waiter that is still waiting
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return True
+        return False
+
+
 class UnraidApiClient:
     """Unraid GraphQL API Client."""
 
     def __init__(self, host: str, api_key: str, session: ClientSession) -> None:
         self.host = host.rstrip("/")
         self.endpoint = self.host + "/graphql"
+        self.ws_endpoint = "ws" + self.endpoint.removeprefix("http")
         self.api_key = api_key
         self.session = session
+        self.version: AwesomeVersion | None = None
+        # Seconds a query result is reused for, 0 only shares requests in flight
+        self.result_ttl: float = 0
+        self._in_flight: dict[tuple, asyncio.Task[Any]] = {}
+        self._results: dict[tuple, tuple[float, Any]] = {}
+        # Counts mutations, queries sent before a mutation are not shared after it
+        self._generation = 0
+        self.scheduler = RequestScheduler()
+        self.stats = ApiStats()
+
+    @property
+    def max_in_flight(self) -> int:
+        """Return the maximum number of requests sent at once."""
+        return self.scheduler.max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, value: int) -> None:
+        self.scheduler.max_in_flight = value
+
+    @overload
+    async def call_api(
+        self,
+        query: str,
+        model: type[_T],
+        variables: dict[str, Any] | None = None,
+        *,
+        partial: Literal[False] = False,
+    ) -> _T: ...
 
+    @overload
     async def call_api(
         self,
         query: str,
         model: type[_T],
         variables: dict[str, Any] | None = None,
-    ) -> _T:
-        response = await self.session.post(
-            self.endpoint,
-            json={"query": query, "variables": variables or {}},
-            headers={
-                "x-api-key": self.api_key,
-                "Origin": self.host,
-                "content-type": "application/json",
-            },
-        )
-        result = await response.json()
-        if "errors" in result:
-            try:
-                if result["errors"][0]["extensions"]["code"] == "UNAUTHENTICATED":
-                    raise UnraidAuthError(response=result)
-            except KeyError:
-                pass
-            raise UnraidGraphQLError(response=result)
+        *,
+        partial: Literal[True],
+    ) -> GraphQLResponse[_T]: ...
 
-        return model.model_validate(result["data"])
+    async def call_api(
+        self,
+        query: str,
+        model: type[_T],
+        variables: dict[str, Any] | None = None,
+        *,
+        partial: bool = False,
+    ) -> _T | GraphQLResponse[_T]:
+        """
+        Run a GraphQL document and validate its data with model.
+
+        Error responses raise, unless partial is set. Then the response is returned with
+        its errors and the partial data, which may be None. Fields that failed are null in
+        partial data, and so are their parents if they are not nullable, model must allow that.
+
+        Concurrent calls of the same query share one request and its result,
+        mutations are always sent and invalidate the shared results.
+        """
+        if query.lstrip().startswith("mutation"):
+            self._generation += 1
+            self._results.clear()
+            return await self._request(
+                query, model, variables, partial=partial, priority=PRIORITY_MUTATION
+            )
+
+        key = (self._generation, query, model, partial, json.dumps(variables, sort_keys=True))
+        if (cached := self._results.get(key)) is not None:
+            if monotonic() - cached[0] < self.result_ttl:
+                return cached[1]
+            del self._results[key]
+
+        if (task := self._in_flight.get(key)) is None:
+            task = asyncio.create_task(
+                self._request(query, model, variables, partial=partial, priority=PRIORITY_QUERY)
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    def _request_done(self, key: tuple, task: asyncio.Task[Any]) -> None:
+        del self._in_flight[key]
+        if task.cancelled():
+            return
+        # Also retrieves the exception if all callers are gone
+        if task.exception() is None and self.result_ttl > 0 and key[0] == self._generation:
+            self._results[key] = (monotonic(), task.result())
+
+    async def _request(
+        self,
+        query: str,
+        model: type[_T],
+        variables: dict[str, Any] | None,
+        *,
+        partial: bool,
+        priority: int,
+    ) -> _T | GraphQLResponse[_T]:
+        stats = self.stats.operation(query)
+        started = monotonic()
+        try:
+            return await self._send(query, model, variables, partial=partial, priority=priority)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.wall_time.add(monotonic() - started)
+
+    async def _send(
+        self,
+        query: str,
+        model: type[_T],
+        variables: dict[str, Any] | None,
+        *,
+        partial: bool,
+        priority: int,
+    ) -> _T | GraphQLResponse[_T]:
+        stats = self.stats.operation(query)
+        async with self.scheduler.slot(priority):
+            sent = monotonic()
+            response = await self.session.post(
+                self.endpoint,
+                json={"query": query, "variables": variables or {}},
+                headers={
+                    "x-api-key": self.api_key,
+                    "Origin": self.host,
+                    "content-type": "application/json",
+                },
+            )
+            # Validate the raw body in pydantic-core without building an intermediate dict
+            body = await response.read()
+        received = monotonic()
+        stats.network_time.add(received - sent)
+        stats.response_bytes.add(len(body))
+        try:
+            result = GraphQLResponse[model].model_validate_json(body)
+        except ValidationError:
+            # Error responses may hold partial data, check them for errors first
+            raw_result = await response.json()
+            if "errors" in raw_result:
+                self._raise_for_errors(raw_result)
+            raise
+        finally:
+            stats.validate_time.add(monotonic() - received)
+
+        if result.errors:
+            if not partial:
+                self._raise_for_errors({"errors": result.errors})
+            _LOGGER.debug("Partial GraphQL response: %s", result.errors)
+        elif result.data is None:
+            # Raises a ValidationError, a response without errors must hold data
+            return model.model_validate(None)
+        return result if partial else result.data
+
+    def _raise_for_errors(self, result: dict) -> None:
+        try:
+            if result["errors"][0]["extensions"]["code"] == "UNAUTHENTICATED":
+                raise UnraidAuthError(response=result)
+        except KeyError:
+            pass
+        raise UnraidGraphQLError(response=result)
+
+    async def subscribe(
+        self, subscriptions: Mapping[str, tuple[str, type[_T]]]
+    ) -> AsyncGenerator[tuple[str, _T]]:
+        """
+        Run subscriptions over a graphql-transport-ws connection.
+
+        Subscriptions are keyed by their operation id, every result is yielded
+        together with the id of its subscription. The generator returns when
+        all subscriptions are completed and raises when the connection is lost.
+        """
+        async with self.session.ws_connect(
+            self.ws_endpoint,
+            protocols=(SUBSCRIPTION_PROTOCOL,),
+            headers={"x-api-key": self.api_key, "Origin": self.host},
+        ) as ws:
+            await ws.send_json({"type": "connection_init", "payload": {"x-api-key": self.api_key}})
+            async with asyncio.timeout(SUBSCRIPTION_ACK_TIMEOUT):
+                message = await ws.receive()
+            if message.type != WSMsgType.TEXT or message.json()["type"] != "connection_ack":
+                self._raise_subscription_closed(ws.close_code)
+
+            for operation_id, (query, _) in subscriptions.items():
+                await ws.send_json(
+                    {"id": operation_id, "type": "subscribe", "payload": {"query": query}}
+                )
+
+            pending = set(subscriptions)
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                result = message.json()
+                match result["type"]:
+                    case "next":
+                        payload = result["payload"]
+                        if "errors" in payload:
+                            raise UnraidGraphQLError(response=payload)
+                        model = subscriptions[result["id"]][1]
+                        yield result["id"], model.model_validate(payload["data"])
+                    case "error":
+                        raise UnraidGraphQLError(response={"errors": result["payload"]})
+                    case "complete":
+                        pending.discard(result["id"])
+                        if not pending:
+                            return
+                    case "ping":
+                        await ws.send_json({"type": "pong"})
+
+            self._raise_subscription_closed(ws.close_code)
+
+    def _raise_subscription_closed(self, close_code: int | None) -> None:
+        if close_code in SUBSCRIPTION_AUTH_CLOSE_CODES:
+            raise UnraidAuthError(response={"errors": [{"message": "Unauthorized"}]})
+        msg = f"Subscription connection closed ({close_code})"
+        raise ClientConnectionError(msg)
 
     async def query_api_version(self) -> AwesomeVersion:
         try:
@@ -118,20 +413,25 @@ class UnraidApiClient:
         pass
 
     @abstractmethod
-    async def query_metrics(self) -> Metrics:
-        pass
+    async def query_metrics(self, *, fields: frozenset[str] | None = None) -> Metrics:
+        """
+        Query the metrics.
+
+        Only the given optional fields (see models.OPTIONAL_FIELDS) are queried,
+        the others are None. All fields are queried if fields is None.
+        """
 
     @abstractmethod
-    async def query_shares(self) -> list[Share]:
-        pass
+    async def query_shares(self, *, fields: frozenset[str] | None = None) -> list[Share]:
+        """Query the shares, see query_metrics for fields."""
 
     @abstractmethod
-    async def query_disks(self) -> list[Disk]:
-        pass
+    async def query_disks(self, *, fields: frozenset[str] | None = None) -> list[Disk]:
+        """Query the disks, see query_metrics for fields."""
 
     @abstractmethod
-    async def query_array(self) -> Array:
-        pass
+    async def query_array(self, *, fields: frozenset[str] | None = None) -> Array:
+        """Query the array, see query_metrics for fields."""
 
     @abstractmethod
     async def query_vms(self) -> list[VirtualMachine]:
@@ -142,37 +442,80 @@ class UnraidApiClient:
         pass
 
     @abstractmethod
-    async def vm_start(self, vm_id: str) -> bool:
+    async def query_combined(
+        self,
+        categories: Collection[str],
+        *,
+        fields: Mapping[str, frozenset[str]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Query multiple categories with a single request.
+
+        Categories are "metrics", "array", "disks", "shares", "vms" and "docker",
+        the result is keyed by category and holds the same values as the single queries.
+        fields holds the optional fields to query by category, categories without
+        entry are queried completely. Categories without any field selected are left out.
+        """
+
+    @abstractmethod
+    def subscribe_metrics(self) -> AsyncIterator[Metrics]:
+        """Stream metrics, yielding every time the server pushes an update."""
+
+    @abstractmethod
+    async def vm_start(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def vm_stop(self, vm_id: str) -> bool:
+    async def vm_stop(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def vm_reboot(self, vm_id: str) -> bool:
+    async def vm_reboot(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def vm_pause(self, vm_id: str) -> bool:
+    async def vm_pause(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def vm_resume(self, vm_id: str) -> bool:
+    async def vm_resume(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def vm_force_stop(self, vm_id: str) -> bool:
+    async def vm_force_stop(self, vm_id: str) -> VmState | None:
         pass
 
     @abstractmethod
-    async def docker_start(self, container_id: str) -> bool:
+    async def docker_start(self, container_id: str) -> DockerState | None:
         pass
 
     @abstractmethod
-    async def docker_stop(self, container_id: str) -> bool:
+    async def docker_stop(self, container_id: str) -> DockerState | None:
         pass
 
+    @abstractmethod
+    async def vm_action_many(
+        self, action: str, vm_ids: Collection[str]
+    ) -> dict[str, VmState | None]:
+        """
+        Run an action on many VMs with one request.
+
+        The result is keyed by VM id and holds None for VMs the action failed on. VMs
+        whose result was lost to the error of another VM hold the state the action leads to.
+        """
+
+    @abstractmethod
+    async def docker_start_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        """Start many Docker containers with one request, see vm_action_many."""
+
+    @abstractmethod
+    async def docker_stop_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        """Stop many Docker containers with one request, see vm_action_many."""
+
 
 ## Queries
 
@@ -191,6 +534,13 @@ query ApiVersion {
 ## Api Models
 
 
+class GraphQLResponse[DataT: BaseModel](BaseModel):
+    """GraphQL response envelope."""
+
+    data: DataT | None = None
+    errors: list[dict[str, Any]] | None = None
+
+
 class ApiVersionQuery(BaseModel):  # noqa: D101
     info: Info
 
@@ -0,0 +1,128 @@
+"""Instrumentation of the requests of the Unraid GraphQL API Client."""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from math import inf
+from typing import Any
+
+# Upper bounds of the histogram buckets, in seconds and bytes
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, inf)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, inf)
+
+# Requests are recorded by operation name, the documents of the client are named
+OPERATION_NAME = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+UNNAMED_OPERATION = "unnamed"
+
+
+def operation_name(query: str) -> str:
+    """Return the operation name of a GraphQL document."""
+    if (match := OPERATION_NAME.match(query)) is None:
+        return UNNAMED_OPERATION
+    return match.group(1)
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Histogram with fixed buckets, the memory does not grow with the samples."""
+
+    bounds: tuple[float, ...]
+    counts: list[int] = field(init=False)
+    count: int = 0
+    total: float = 0
+    maximum: float = 0
+    last: float | None = None
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * len(self.bounds)
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+        self.last = value
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of all samples."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for the diagnostics."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "maximum": self.maximum,
+            "last": self.last,
+            "buckets": {
+                str(bound): count for bound, count in zip(self.bounds, self.counts, strict=True)
+            },
+        }
+
+
+@dataclass(slots=True)
+class OperationStats:
+    """Statistics of the requests of one operation."""
+
+    # Time from the call until the result, including the wait for a free request slot
+    wall_time: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    # Time to send the request and read the response
+    network_time: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    # Time to decode and validate the response, pydantic does both in one pass
+    validate_time: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    response_bytes: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for the diagnostics."""
+        return {
+            "wall_time": self.wall_time.as_dict(),
+            "network_time": self.network_time.as_dict(),
+            "validate_time": self.validate_time.as_dict(),
+            "response_bytes": self.response_bytes.as_dict(),
+            "errors": self.errors,
+        }
+
+
+@dataclass(slots=True)
+class ApiStats:
+    """Statistics of the requests of a client, by operation name."""
+
+    operations: dict[str, OperationStats] = field(default_factory=dict)
+
+    def operation(self, query: str) -> OperationStats:
+        """Return the statistics of the operation of a GraphQL document."""
+        name = operation_name(query)
+        if (stats := self.operations.get(name)) is None:
+            stats = self.operations[name] = OperationStats()
+        return stats
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests."""
+        return sum(stats.wall_time.count for stats in self.operations.values())
+
+    @property
+    def errors(self) -> int:
+        """Return the number of failed requests."""
+        return sum(stats.errors for stats in self.operations.values())
+
+    @property
+    def mean_wall_time(self) -> float | None:
+        """Return the mean wall time of all requests."""
+        if not (requests := self.requests):
+            return None
+        return sum(stats.wall_time.total for stats in self.operations.values()) / requests
+
+    @property
+    def response_bytes(self) -> int:
+        """Return the bytes received in all responses."""
+        return int(sum(stats.response_bytes.total for stats in self.operations.values()))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for the diagnostics."""
+        return {name: stats.as_dict() for name, stats in self.operations.items()}
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+from fnmatch import fnmatchcase
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
 from pydantic import BaseModel, Field
 
 from custom_components.unraid_api.models import (
     Array,
     ArrayState,
     Disk,
-    DiskStatus,
-    DiskType,
     DockerContainer,
     DockerState,
     Metrics,
@@ -21,6 +23,9 @@ from custom_components.unraid_api.models import (
 
 from . import UnraidApiClient
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Collection, Mapping
+
 
 class UnraidApiV420(UnraidApiClient):
     """
@@ -37,169 +42,232 @@ class UnraidApiV420(UnraidApiClient):
             unraid_version=response.info.versions.core.unraid,
         )
 
-    async def query_metrics(self) -> Metrics:
-        response = await self.call_api(METRICS_QUERY, MetricsQuery)
-        return Metrics(
-            memory_free=response.metrics.memory.free,
-            memory_total=response.metrics.memory.total,
-            memory_active=response.metrics.memory.active,
-            memory_available=response.metrics.memory.available,
-            memory_percent_total=response.metrics.memory.percent_total,
-            cpu_percent_total=response.metrics.cpu.percent_total,
-        )
+    async def query_metrics(self, *, fields: frozenset[str] | None = None) -> Metrics:
+        if not (query := build_query("metrics", fields)):
+            # No metric is used
+            return Metrics()
+        response = await self.call_api(query, MetricsQuery)
+        return _parse_metrics(response.metrics)
 
-    async def query_shares(self) -> list[Share]:
-        response = await self.call_api(SHARES_QUERY, SharesQuery)
-        return [
-            Share(
-                name=share.name,
-                free=share.free,
-                used=share.used,
-                size=share.size,
-                allocator=share.allocator,
-                floor=share.floor,
-            )
-            for share in response.shares
-        ]
-
-    async def query_disks(self) -> list[Disk]:
-        response = await self.call_api(DISKS_QUERY, DiskQuery)
-        disks = [
-            Disk(
-                name=disk.name,
-                status=disk.status,
-                temp=disk.temp,
-                fs_size=disk.fs_size,
-                fs_free=disk.fs_free,
-                fs_used=disk.fs_used,
-                type=disk.type,
-                id=disk.id,
-                is_spinning=disk.is_spinning,
-            )
-            for disk in response.array.disks
-        ]
-        disks.extend(
-            [
-                Disk(
-                    name=disk.name,
-                    status=disk.status,
-                    temp=disk.temp,
-                    fs_size=disk.fs_size,
-                    fs_free=disk.fs_free,
-                    fs_used=disk.fs_used,
-                    type=disk.type,
-                    id=disk.id,
-                    is_spinning=disk.is_spinning,
-                )
-                for disk in response.array.caches
-            ]
-        )
-        disks.extend(
-            [
-                Disk(
-                    name=disk.name,
-                    status=disk.status,
-                    temp=disk.temp,
-                    fs_size=None,
-                    fs_free=None,
-                    fs_used=None,
-                    type=disk.type,
-                    id=disk.id,
-                    is_spinning=disk.is_spinning,
-                )
-                for disk in response.array.parities
-            ]
-        )
-        return disks
-
-    async def query_array(self) -> Array:
-        response = await self.call_api(ARRAY_QUERY, ArrayQuery)
-        return Array(
-            state=response.array.state,
-            capacity_free=response.array.capacity.kilobytes.free,
-            capacity_used=response.array.capacity.kilobytes.used,
-            capacity_total=response.array.capacity.kilobytes.total,
-        )
+    async def query_shares(self, *, fields: frozenset[str] | None = None) -> list[Share]:
+        response = await self.call_api(build_query("shares", fields), SharesQuery)
+        return response.shares
+
+    async def query_disks(self, *, fields: frozenset[str] | None = None) -> list[Disk]:
+        response = await self.call_api(build_query("disks", fields), DiskQuery)
+        return _parse_disks(response.array)
+
+    async def query_array(self, *, fields: frozenset[str] | None = None) -> Array:
+        response = await self.call_api(build_query("array", fields), ArrayQuery)
+        return _parse_array(response.array)
 
     async def query_vms(self) -> list[VirtualMachine]:
         response = await self.call_api(VMS_QUERY, VmsQuery)
-        return [
-            VirtualMachine(
-                id=vm.id,
-                name=vm.name,
-                state=vm.state,
-            )
-            for vm in response.vms.domain
-        ]
+        return response.vms.domain
 
     async def query_docker_containers(self) -> list[DockerContainer]:
         response = await self.call_api(DOCKER_QUERY, DockerQuery)
-        return [
-            DockerContainer(
-                id=container.id,
-                name=container.names[0].lstrip("/") if container.names else container.id,
-                state=container.state,
-                image=container.image,
-                autostart=container.auto_start,
-            )
-            for container in response.docker.containers
-        ]
-
-    async def vm_start(self, vm_id: str) -> bool:
+        return response.docker.containers
+
+    async def query_combined(
+        self,
+        categories: Collection[str],
+        *,
+        fields: Mapping[str, frozenset[str]] | None = None,
+    ) -> dict[str, Any]:
+        """Query all given categories with a single request."""
+        fields = fields or {}
+        categories = frozenset(
+            category
+            for category in categories
+            if build_selection(category, fields.get(category))
+        )
+        if not categories:
+            return {}
+        response = await self.call_api(
+            build_combined_query(
+                categories, frozenset((category, fields[category]) for category in fields)
+            ),
+            CombinedQuery,
+        )
+        result = {}
+        if response.metrics is not None:
+            result["metrics"] = _parse_metrics(response.metrics)
+        if response.array is not None:
+            result["array"] = _parse_array(response.array)
+        if response.disks is not None:
+            result["disks"] = _parse_disks(response.disks)
+        if response.shares is not None:
+            result["shares"] = response.shares
+        if response.vms is not None:
+            result["vms"] = response.vms.domain
+        if response.docker is not None:
+            result["docker"] = response.docker.containers
+        return result
+
+    async def subscribe_metrics(self) -> AsyncGenerator[Metrics]:
+        cpu: MetricsCpu | None = None
+        memory: MetricsMemory | None = None
+        async for _, response in self.subscribe(
+            {
+                "cpu": (CPU_SUBSCRIPTION, CpuSubscription),
+                "memory": (MEMORY_SUBSCRIPTION, MemorySubscription),
+            }
+        ):
+            if isinstance(response, CpuSubscription):
+                cpu = response.system_metrics_cpu
+            elif isinstance(response, MemorySubscription):
+                memory = response.system_metrics_memory
+            # Both subscriptions are needed for complete metrics
+            if cpu is not None and memory is not None:
+                yield _parse_metrics(_Metrics(memory=memory, cpu=cpu))
+
+    async def vm_start(self, vm_id: str) -> VmState | None:
         """Start a VM."""
         response = await self.call_api(
             VM_START_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.start is not None
+        return _action_state(response.vm.start)
 
-    async def vm_stop(self, vm_id: str) -> bool:
+    async def vm_stop(self, vm_id: str) -> VmState | None:
         """Stop a VM."""
         response = await self.call_api(
             VM_STOP_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.stop is not None
+        return _action_state(response.vm.stop)
 
-    async def vm_reboot(self, vm_id: str) -> bool:
+    async def vm_reboot(self, vm_id: str) -> VmState | None:
         """Reboot a VM."""
         response = await self.call_api(
             VM_REBOOT_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.reboot is not None
+        return _action_state(response.vm.reboot)
 
-    async def vm_pause(self, vm_id: str) -> bool:
+    async def vm_pause(self, vm_id: str) -> VmState | None:
         """Pause a VM."""
         response = await self.call_api(
             VM_PAUSE_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.pause is not None
+        return _action_state(response.vm.pause)
 
-    async def vm_resume(self, vm_id: str) -> bool:
+    async def vm_resume(self, vm_id: str) -> VmState | None:
         """Resume a VM."""
         response = await self.call_api(
             VM_RESUME_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.resume is not None
+        return _action_state(response.vm.resume)
 
-    async def vm_force_stop(self, vm_id: str) -> bool:
+    async def vm_force_stop(self, vm_id: str) -> VmState | None:
         """Force stop a VM."""
         response = await self.call_api(
             VM_FORCE_STOP_MUTATION, VmActionResponse, variables={"id": vm_id}
         )
-        return response.vm.force_stop is not None
+        return _action_state(response.vm.force_stop)
 
-    async def docker_start(self, container_id: str) -> bool:
+    async def docker_start(self, container_id: str) -> DockerState | None:
         """Start a Docker container."""
         response = await self.call_api(
             DOCKER_START_MUTATION, DockerActionResponse, variables={"id": container_id}
         )
-        return response.docker.start is not None
+        return _action_state(response.docker.start)
 
-    async def docker_stop(self, container_id: str) -> bool:
+    async def docker_stop(self, container_id: str) -> DockerState | None:
         """Stop a Docker container."""
         response = await self.call_api(
             DOCKER_STOP_MUTATION, DockerActionResponse, variables={"id": container_id}
         )
-        return response.docker.stop is not None
+        return _action_state(response.docker.stop)
+
+    async def vm_action_many(
+        self, action: str, vm_ids: Collection[str]
+    ) -> dict[str, VmState | None]:
+        """Run an action on many VMs with one aliased mutation."""
+        return await self._call_bulk("vm", VM_ACTION_FIELDS[action], vm_ids, BulkVmActionResponse)
+
+    async def docker_start_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        """Start many Docker containers with one aliased mutation."""
+        return await self._call_bulk("docker", "start", container_ids, BulkDockerActionResponse)
+
+    async def docker_stop_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        """Stop many Docker containers with one aliased mutation."""
+        return await self._call_bulk("docker", "stop", container_ids, BulkDockerActionResponse)
+
+    async def _call_bulk(
+        self,
+        root: str,
+        field: str,
+        item_ids: Collection[str],
+        model: type[BulkVmActionResponse | BulkDockerActionResponse],
+    ) -> dict[str, Any]:
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return {}
+        # A failing item does not undo the others, keep the results that succeeded
+        response = await self.call_api(
+            build_bulk_mutation(root, field, len(item_ids)),
+            model,
+            variables={f"id{index}": item_id for index, item_id in enumerate(item_ids)},
+            partial=True,
+        )
+        failed = set()
+        for error in response.errors or ():
+            path = error.get("path") or ()
+            if len(path) < 2 or path[0] != root:  # noqa: PLR2004
+                # Not the error of a single item
+                self._raise_for_errors({"errors": response.errors})
+            failed.add(path[1])
+        results = getattr(response.data, root, None)
+        if results is None:
+            # The failure of a non-null item nulls all results, the items without an error
+            # of their own succeeded
+            state = BULK_ACTION_STATES[root][field]
+            return {
+                item_id: None if f"item{index}" in failed else state
+                for index, item_id in enumerate(item_ids)
+            }
+        return {
+            item_id: _action_state(results.get(f"item{index}"))
+            for index, item_id in enumerate(item_ids)
+        }
+
+
+def _parse_metrics(metrics: _Metrics) -> Metrics:
+    memory = metrics.memory or MetricsMemory()
+    cpu = metrics.cpu or MetricsCpu()
+    return Metrics(
+        memory_free=memory.free,
+        memory_total=memory.total,
+        memory_active=memory.active,
+        memory_available=memory.available,
+        memory_percent_total=memory.percent_total,
+        cpu_percent_total=cpu.percent_total,
+    )
+
+
+def _parse_disks(array: DisksArray) -> list[Disk]:
+    return [*array.disks, *array.caches, *array.parities]
+
+
+def _parse_array(array: _Array) -> Array:
+    if array.capacity is None:
+        return Array(state=array.state)
+    return Array(
+        state=array.state,
+        capacity_free=array.capacity.kilobytes.free,
+        capacity_used=array.capacity.kilobytes.used,
+        capacity_total=array.capacity.kilobytes.total,
+    )
+
+
+def _action_state(
+    result: _VmActionResult | _DockerActionResult | None,
+) -> VmState | DockerState | None:
+    """Return the state after a mutation, None if the mutation returned no result."""
+    return result.state if result is not None else None
 
 
 ## Queries
@@ -220,8 +288,7 @@ query ServerInfo {
 }
 """
 
-METRICS_QUERY = """
-query Metrics {
+METRICS_SELECTION = """
   metrics {
     memory {
       free
@@ -234,11 +301,9 @@ query Metrics {
       percentTotal
     }
   }
-}
 """
 
-SHARES_QUERY = """
-query Shares {
+SHARES_SELECTION = """
   shares {
     name
     free
@@ -247,11 +312,9 @@ query Shares {
     allocator
     floor
   }
-}
 """
 
-DISKS_QUERY = """
-query Disks {
+DISKS_SELECTION = """
   array {
     caches {
       name
@@ -271,7 +334,6 @@ query Disks {
       fsSize
       fsFree
       fsUsed
-      fsType
       type
       id
       isSpinning
@@ -285,11 +347,9 @@ query Disks {
       isSpinning
     }
   }
-}
 """
 
-ARRAY_QUERY = """
-query Array {
+ARRAY_SELECTION = """
   array {
     state
     capacity {
@@ -300,12 +360,9 @@ query Array {
       }
     }
   }
-}
-
 """
 
-VMS_QUERY = """
-query VMs {
+VMS_SELECTION = """
   vms {
     domain {
       id
@@ -313,11 +370,11 @@ query VMs {
       state
     }
   }
-}
 """
 
-DOCKER_QUERY = """
-query Docker {
+VMS_QUERY = "query VMs {" + VMS_SELECTION + "}\n"
+
+DOCKER_SELECTION = """
   docker {
     containers {
       id
@@ -327,6 +384,131 @@ query Docker {
       autoStart
     }
   }
+"""
+
+DOCKER_QUERY = "query Docker {" + DOCKER_SELECTION + "}\n"
+
+# Selection of each category, aliased by category name in the combined query
+CATEGORY_SELECTIONS = {
+    "metrics": METRICS_SELECTION,
+    "array": ARRAY_SELECTION,
+    "disks": DISKS_SELECTION,
+    "shares": SHARES_SELECTION,
+    "vms": VMS_SELECTION,
+    "docker": DOCKER_SELECTION,
+}
+
+# Paths of the optional model fields in the selection of their category
+FIELD_PATHS = {
+    "metrics": {
+        "memory_free": "metrics.memory.free",
+        "memory_total": "metrics.memory.total",
+        "memory_active": "metrics.memory.active",
+        "memory_available": "metrics.memory.available",
+        "memory_percent_total": "metrics.memory.percentTotal",
+        "cpu_percent_total": "metrics.cpu.percentTotal",
+    },
+    "array": {
+        "capacity_free": "array.capacity.kilobytes.free",
+        "capacity_used": "array.capacity.kilobytes.used",
+        "capacity_total": "array.capacity.kilobytes.total",
+    },
+    "disks": {
+        "temp": "array.*.temp",
+        "fs_size": "array.*.fsSize",
+        "fs_free": "array.*.fsFree",
+        "fs_used": "array.*.fsUsed",
+    },
+    "shares": {
+        "free": "shares.free",
+        "used": "shares.used",
+        "size": "shares.size",
+        "allocator": "shares.allocator",
+        "floor": "shares.floor",
+    },
+}
+
+
+@cache
+def build_selection(category: str, fields: frozenset[str] | None) -> str:
+    """
+    Build the selection of a category with only the given optional fields.
+
+    All fields are selected if fields is None, the selection is empty if nothing is left.
+    """
+    selection = CATEGORY_SELECTIONS[category]
+    if fields is None or category not in FIELD_PATHS:
+        return selection
+    excluded = [path for field, path in FIELD_PATHS[category].items() if field not in fields]
+    return _prune_selection(selection, excluded)
+
+
+@cache
+def build_query(category: str, fields: frozenset[str] | None) -> str:
+    """Build the query of a category, empty if nothing is selected."""
+    if not (selection := build_selection(category, fields)):
+        return ""
+    return f"query {category.capitalize()} {{" + selection + "}\n"
+
+
+@cache
+def build_combined_query(
+    categories: frozenset[str],
+    fields: frozenset[tuple[str, frozenset[str]]] = frozenset(),
+) -> str:
+    """Build one query document for all given categories, aliased by category."""
+    category_fields = dict(fields)
+    selections = "".join(
+        f"  {category}: {selection.strip()}\n"
+        for category in CATEGORY_SELECTIONS
+        if category in categories
+        and (selection := build_selection(category, category_fields.get(category)))
+    )
+    return "query Combined {\n" + selections + "}\n"
+
+
+def _prune_selection(selection: str, excluded: Collection[str]) -> str:
+    """Remove the fields matching the excluded paths, and the objects left empty."""
+    lines: list[str] = []
+    path: list[str] = []
+    # Index of the line opening each object of the path
+    opened: list[int] = []
+    for line in selection.splitlines(keepends=True):
+        name = line.strip()
+        if name.endswith("{"):
+            path.append(name.removesuffix("{").strip())
+            opened.append(len(lines))
+            lines.append(line)
+        elif name == "}":
+            path.pop()
+            start = opened.pop()
+            if len(lines) == start + 1:
+                del lines[start]
+            else:
+                lines.append(line)
+        elif not any(fnmatchcase(".".join([*path, name]), pattern) for pattern in excluded):
+            lines.append(line)
+    pruned = "".join(lines)
+    return pruned if pruned.strip() else ""
+
+
+CPU_SUBSCRIPTION = """
+subscription CpuMetrics {
+  systemMetricsCpu {
+    percentTotal
+  }
+}
+"""
+
+MEMORY_SUBSCRIPTION = """
+subscription MemoryMetrics {
+  systemMetricsMemory {
+    free
+    total
+    percentTotal
+    active
+    available
+  }
 }
 """
 
@@ -418,6 +600,41 @@ mutation StopContainer($id: PrefixedID!) {
 }
 """
 
+# Mutation fields of the VM actions
+VM_ACTION_FIELDS = {
+    "start": "start",
+    "stop": "stop",
+    "reboot": "reboot",
+    "pause": "pause",
+    "resume": "resume",
+    "force_stop": "forceStop",
+}
+
+# State after each mutation field of the bulk actions, for results lost to another error
+BULK_ACTION_STATES = {
+    "vm": {
+        "start": VmState.RUNNING,
+        "stop": VmState.SHUTDOWN,
+        "reboot": VmState.RUNNING,
+        "pause": VmState.PAUSED,
+        "resume": VmState.RUNNING,
+        "forceStop": VmState.SHUTDOWN,
+    },
+    "docker": {"start": DockerState.RUNNING, "stop": DockerState.EXITED},
+}
+
+
+@cache
+def build_bulk_mutation(root: str, field: str, count: int) -> str:
+    """Build one mutation document running field for count ids, aliased by index."""
+    variables = ", ".join(f"$id{index}: PrefixedID!" for index in range(count))
+    selections = "".join(
+        f"    item{index}: {field}(id: $id{index}) {{\n      id\n      state\n    }}\n"
+        for index in range(count)
+    )
+    return f"mutation Bulk({variables}) {{\n  {root} {{\n{selections}  }}\n}}\n"
+
+
 ## Api Models
 
 
@@ -449,35 +666,35 @@ class MetricsQuery(BaseModel):  # noqa: D101
     metrics: _Metrics
 
 
+# Fields are missing when they are not selected
 class _Metrics(BaseModel):
-    memory: MetricsMemory
-    cpu: MetricsCpu
+    memory: MetricsMemory | None = None
+    cpu: MetricsCpu | None = None
 
 
 class MetricsMemory(BaseModel):  # noqa: D101
-    free: int
-    total: int
-    active: int
-    percent_total: float = Field(alias="percentTotal")
-    available: int
+    free: int | None = None
+    total: int | None = None
+    active: int | None = None
+    percent_total: float | None = Field(alias="percentTotal", default=None)
+    available: int | None = None
 
 
 class MetricsCpu(BaseModel):  # noqa: D101
-    percent_total: float = Field(alias="percentTotal")
+    percent_total: float | None = Field(alias="percentTotal", default=None)
 
 
-### Shares
-class SharesQuery(BaseModel):  # noqa: D101
-    shares: list[_Share]
+class CpuSubscription(BaseModel):  # noqa: D101
+    system_metrics_cpu: MetricsCpu = Field(alias="systemMetricsCpu")
 
 
-class _Share(BaseModel):
-    name: str
-    free: int
-    used: int
-    size: int
-    allocator: str
-    floor: str
+class MemorySubscription(BaseModel):  # noqa: D101
+    system_metrics_memory: MetricsMemory = Field(alias="systemMetricsMemory")
+
+
+### Shares
+class SharesQuery(BaseModel):  # noqa: D101
+    shares: list[Share]
 
 
 ### Disks
@@ -486,24 +703,9 @@ class DiskQuery(BaseModel):  # noqa: D101
 
 
 class DisksArray(BaseModel):  # noqa: D101
-    disks: list[FSDisk]
-    parities: list[ParityDisk]
-    caches: list[FSDisk]
-
-
-class ParityDisk(BaseModel):  # noqa: D101
-    name: str
-    status: DiskStatus
-    temp: int | None
-    type: DiskType
-    id: str
-    is_spinning: bool = Field(alias="isSpinning")
-
-
-class FSDisk(ParityDisk):  # noqa: D101
-    fs_size: int | None = Field(alias="fsSize")
-    fs_free: int | None = Field(alias="fsFree")
-    fs_used: int | None = Field(alias="fsUsed")
+    disks: list[Disk]
+    parities: list[Disk]
+    caches: list[Disk]
 
 
 ### Array
@@ -513,7 +715,7 @@ class ArrayQuery(BaseModel):  # noqa: D101
 
 class _Array(BaseModel):
     state: ArrayState
-    capacity: ArrayCapacity
+    capacity: ArrayCapacity | None = None
 
 
 class ArrayCapacity(BaseModel):  # noqa: D101
@@ -521,9 +723,9 @@ class ArrayCapacity(BaseModel):  # noqa: D101
 
 
 class ArrayCapacityKilobytes(BaseModel):  # noqa: D101
-    free: int
-    used: int
-    total: int
+    free: int | None = None
+    used: int | None = None
+    total: int | None = None
 
 
 ### VMs
@@ -532,13 +734,7 @@ class VmsQuery(BaseModel):  # noqa: D101
 
 
 class _VmsRoot(BaseModel):
-    domain: list[_VM]
-
-
-class _VM(BaseModel):
-    id: str
-    name: str
-    state: VmState
+    domain: list[VirtualMachine]
 
 
 class _VmActionResult(BaseModel):  # noqa: D101
@@ -559,21 +755,17 @@ class VmActionResponse(BaseModel):  # noqa: D101
     vm: _VmMutations
 
 
+class BulkVmActionResponse(BaseModel):  # noqa: D101
+    vm: dict[str, _VmActionResult | None] | None = None
+
+
 ### Docker
 class DockerQuery(BaseModel):  # noqa: D101
     docker: _DockerRoot
 
 
 class _DockerRoot(BaseModel):
-    containers: list[_Container]
-
-
-class _Container(BaseModel):
-    id: str
-    names: list[str]
-    state: DockerState
-    image: str
-    auto_start: bool = Field(alias="autoStart")
+    containers: list[DockerContainer]
 
 
 class _DockerActionResult(BaseModel):  # noqa: D101
@@ -588,3 +780,17 @@ class _DockerMutations(BaseModel):  # noqa: D101
 
 class DockerActionResponse(BaseModel):  # noqa: D101
     docker: _DockerMutations
+
+
+class BulkDockerActionResponse(BaseModel):  # noqa: D101
+    docker: dict[str, _DockerActionResult | None] | None = None
+
+
+### Combined
+class CombinedQuery(BaseModel):  # noqa: D101
+    metrics: _Metrics | None = None
+    array: _Array | None = None
+    disks: DisksArray | None = None
+    shares: list[Share] | None = None
+    vms: _VmsRoot | None = None
+    docker: _DockerRoot | None = None
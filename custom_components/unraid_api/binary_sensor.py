@@ -54,10 +54,11 @@ async def async_setup_entry(
     """Set up this integration using config entry."""
 
     @callback
-    def add_disk_callback(disk: Disk) -> None:
-        _LOGGER.debug("Adding new disk: %s", disk.name)
+    def add_disk_callback(disks: list[Disk]) -> None:
+        _LOGGER.debug("Adding new disks: %s", ", ".join(disk.name for disk in disks))
         entities = [
             UnraidDiskBinarySensorEntity(description, config_entry, disk.id)
+            for disk in disks
             for description in DISK_BINARY_SENSOR_DESCRIPTIONS
         ]
         async_add_entites(entities)
@@ -80,7 +81,7 @@ class UnraidDiskBinarySensorEntity(
         config_entry: UnraidConfigEntry,
         disk_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("disks", disk_id))
         self.disk_id = disk_id
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}-{self.disk_id}"
@@ -91,6 +92,10 @@ class UnraidDiskBinarySensorEntity(
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("disks")
+
     @property
     def is_on(self) -> StateType:
         try:
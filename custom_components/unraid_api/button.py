@@ -74,19 +74,23 @@ async def async_setup_entry(
     """Set up this integration using config entry."""
 
     @callback
-    def add_vm_callback(vm: VirtualMachine) -> None:
-        _LOGGER.debug("Adding VM buttons: %s", vm.name)
+    def add_vm_callback(vms: list[VirtualMachine]) -> None:
+        _LOGGER.debug("Adding VM buttons: %s", ", ".join(vm.name for vm in vms))
         entities = [
             UnraidVmButton(config_entry, description, vm.id)
+            for vm in vms
             for description in VM_BUTTON_DESCRIPTIONS
         ]
         async_add_entities(entities)
 
     @callback
-    def add_docker_callback(container: DockerContainer) -> None:
-        _LOGGER.debug("Adding Docker buttons: %s", container.name)
+    def add_docker_callback(containers: list[DockerContainer]) -> None:
+        _LOGGER.debug(
+            "Adding Docker buttons: %s", ", ".join(container.name for container in containers)
+        )
         entities = [
             UnraidDockerButton(config_entry, description, container.id)
+            for container in containers
             for description in DOCKER_BUTTON_DESCRIPTIONS
         ]
         async_add_entities(entities)
@@ -109,7 +113,7 @@ class UnraidVmButton(CoordinatorEntity[UnraidDataUpdateCoordinator], ButtonEntit
         description: UnraidVmButtonEntityDescription,
         vm_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("vms", vm_id))
         self.vm_id = vm_id
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}-{self.vm_id}"
@@ -120,6 +124,10 @@ class UnraidVmButton(CoordinatorEntity[UnraidDataUpdateCoordinator], ButtonEntit
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("vms")
+
     async def async_press(self) -> None:
         """Handle the button press."""
         await self.coordinator.async_vm_action(self.vm_id, self.entity_description.action)
@@ -137,7 +145,7 @@ class UnraidDockerButton(CoordinatorEntity[UnraidDataUpdateCoordinator], ButtonE
         description: UnraidDockerButtonEntityDescription,
         container_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("docker", container_id))
         self.container_id = container_id
         self.entity_description = description
         self._attr_unique_id = (
@@ -150,6 +158,10 @@ class UnraidDockerButton(CoordinatorEntity[UnraidDataUpdateCoordinator], ButtonE
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("docker")
+
     async def async_press(self) -> None:
         """Handle the button press."""
         await self.coordinator.async_docker_action(
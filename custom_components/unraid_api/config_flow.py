@@ -16,12 +16,41 @@ from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlowWit
 from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_VERIFY_SSL
 from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.selector import BooleanSelector
+from homeassistant.helpers.selector import (
+    BooleanSelector,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+)
 from homeassistant.helpers.typing import UNDEFINED, UndefinedType
 
 from . import UnraidConfigEntry
 from .api import IncompatibleApiError, UnraidAuthError, UnraidGraphQLError, get_api_client
-from .const import CONF_DOCKER, CONF_DRIVES, CONF_SHARES, CONF_VMS, DOMAIN
+from .const import (
+    CONF_API_VERSION,
+    CONF_ARRAY_INTERVAL,
+    CONF_COMBINED_QUERY,
+    CONF_DISKS_INTERVAL,
+    CONF_DOCKER,
+    CONF_DOCKER_INTERVAL,
+    CONF_DRIVES,
+    CONF_LIVE_METRICS,
+    CONF_MAX_REQUESTS,
+    CONF_METRICS_INTERVAL,
+    CONF_SHARES,
+    CONF_SHARES_INTERVAL,
+    CONF_VMS,
+    CONF_VMS_INTERVAL,
+    DEFAULT_ARRAY_INTERVAL,
+    DEFAULT_DISKS_INTERVAL,
+    DEFAULT_DOCKER_INTERVAL,
+    DEFAULT_MAX_REQUESTS,
+    DEFAULT_METRICS_INTERVAL,
+    DEFAULT_SHARES_INTERVAL,
+    DEFAULT_VMS_INTERVAL,
+    DOMAIN,
+    MIN_INTERVAL,
+)
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigFlowResult
@@ -37,6 +66,12 @@ USER_DATA_SCHEMA = vol.Schema(
         vol.Optional(CONF_VERIFY_SSL, default=True): bool,
     }
 )
+INTERVAL_SELECTOR = NumberSelector(
+    NumberSelectorConfig(
+        min=MIN_INTERVAL, max=86400, unit_of_measurement="s", mode=NumberSelectorMode.BOX
+    )
+)
+
 REAUTH_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_API_KEY): str,
@@ -49,6 +84,17 @@ OPTIONS_SCHEMA = vol.Schema(
         vol.Required(CONF_SHARES, default=True): BooleanSelector(),
         vol.Required(CONF_VMS, default=False): BooleanSelector(),
         vol.Required(CONF_DOCKER, default=False): BooleanSelector(),
+        vol.Required(CONF_COMBINED_QUERY, default=True): BooleanSelector(),
+        vol.Required(CONF_LIVE_METRICS, default=False): BooleanSelector(),
+        vol.Required(CONF_METRICS_INTERVAL, default=DEFAULT_METRICS_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_ARRAY_INTERVAL, default=DEFAULT_ARRAY_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_DISKS_INTERVAL, default=DEFAULT_DISKS_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_SHARES_INTERVAL, default=DEFAULT_SHARES_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_VMS_INTERVAL, default=DEFAULT_VMS_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_DOCKER_INTERVAL, default=DEFAULT_DOCKER_INTERVAL): INTERVAL_SELECTOR,
+        vol.Required(CONF_MAX_REQUESTS, default=DEFAULT_MAX_REQUESTS): NumberSelector(
+            NumberSelectorConfig(min=1, max=10, mode=NumberSelectorMode.BOX)
+        ),
     }
 )
 
@@ -81,6 +127,7 @@ class UnraidConfigFlow(ConfigFlow, domain=DOMAIN):
             )
             response = await api_client.query_server_info()
             self.title = response.name
+            self.data[CONF_API_VERSION] = str(api_client.version)
         except ClientConnectorSSLError:
             _LOGGER.exception("SSL error")
             self.errors = {"base": "ssl_error"}
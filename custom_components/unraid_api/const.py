@@ -14,7 +14,31 @@ PLATFORMS = [
     Platform.BUTTON,
 ]
 
+CONF_API_VERSION: Final[str] = "api_version"
 CONF_SHARES: Final[str] = "shares"
 CONF_DRIVES: Final[str] = "drives"
 CONF_VMS: Final[str] = "vms"
 CONF_DOCKER: Final[str] = "docker"
+CONF_COMBINED_QUERY: Final[str] = "combined_query"
+CONF_LIVE_METRICS: Final[str] = "live_metrics"
+CONF_METRICS_INTERVAL: Final[str] = "metrics_interval"
+CONF_ARRAY_INTERVAL: Final[str] = "array_interval"
+CONF_DISKS_INTERVAL: Final[str] = "disks_interval"
+CONF_SHARES_INTERVAL: Final[str] = "shares_interval"
+CONF_VMS_INTERVAL: Final[str] = "vms_interval"
+CONF_DOCKER_INTERVAL: Final[str] = "docker_interval"
+CONF_MAX_REQUESTS: Final[str] = "max_requests"
+
+# Default polling interval in seconds of each category
+DEFAULT_METRICS_INTERVAL: Final[int] = 60
+DEFAULT_ARRAY_INTERVAL: Final[int] = 300
+DEFAULT_DISKS_INTERVAL: Final[int] = 60
+DEFAULT_SHARES_INTERVAL: Final[int] = 600
+DEFAULT_VMS_INTERVAL: Final[int] = 60
+DEFAULT_DOCKER_INTERVAL: Final[int] = 60
+MIN_INTERVAL: Final[int] = 10
+# Requests sent to the server at once, the API serves the webGUI as well
+DEFAULT_MAX_REQUESTS: Final[int] = 2
+
+VM_ACTIONS: Final = ("start", "stop", "reboot", "pause", "resume", "force_stop")
+DOCKER_ACTIONS: Final = ("start", "stop")
@@ -4,30 +4,137 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import Counter
+from dataclasses import replace
 from datetime import timedelta
-from typing import TYPE_CHECKING, Any, TypedDict
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict, TypeVar
 
-from aiohttp import ClientConnectionError, ClientConnectorSSLError
+from aiohttp import ClientConnectionError, ClientConnectorSSLError, ClientError
+from awesomeversion import AwesomeVersion
+from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_VERIFY_SSL
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from pydantic import TypeAdapter
 from pydantic_core import ValidationError
 
-from .api import IncompatibleApiError, UnraidAuthError, UnraidGraphQLError
-from .const import CONF_DOCKER, CONF_DRIVES, CONF_SHARES, CONF_VMS, DOMAIN
+from .api import IncompatibleApiError, UnraidAuthError, UnraidGraphQLError, get_api_client
+from .api.instrumentation import DURATION_BUCKETS, ApiStats, Histogram
+from .const import (
+    CONF_API_VERSION,
+    CONF_ARRAY_INTERVAL,
+    CONF_COMBINED_QUERY,
+    CONF_DISKS_INTERVAL,
+    CONF_DOCKER,
+    CONF_DOCKER_INTERVAL,
+    CONF_DRIVES,
+    CONF_MAX_REQUESTS,
+    CONF_METRICS_INTERVAL,
+    CONF_SHARES,
+    CONF_SHARES_INTERVAL,
+    CONF_VMS,
+    CONF_VMS_INTERVAL,
+    DEFAULT_ARRAY_INTERVAL,
+    DEFAULT_DISKS_INTERVAL,
+    DEFAULT_DOCKER_INTERVAL,
+    DEFAULT_MAX_REQUESTS,
+    DEFAULT_METRICS_INTERVAL,
+    DEFAULT_SHARES_INTERVAL,
+    DEFAULT_VMS_INTERVAL,
+    DOMAIN,
+    MIN_INTERVAL,
+    VM_ACTIONS,
+)
+from .forecast import FillRateEstimator
+from .history import MetricHistory
+
+# Required at runtime to validate the snapshot
+from .models import (
+    DISK_FS_FIELDS,
+    OPTIONAL_FIELDS,
+    Array,
+    ArrayState,
+    Disk,
+    DiskType,
+    DockerContainer,
+    Metrics,
+    ServerInfo,
+    Share,
+    VirtualMachine,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Collection, Mapping
 
     from homeassistant.core import HomeAssistant
 
     from . import UnraidConfigEntry
     from .api import UnraidApiClient
-    from .models import Array, Disk, DockerContainer, Metrics, Share, VirtualMachine
 
 _LOGGER = logging.getLogger(__name__)
 
+_ItemT = TypeVar("_ItemT", Metrics, Array, Disk, Share, VirtualMachine, DockerContainer)
+
+SUBSCRIPTION_RETRY_MIN = 5
+SUBSCRIPTION_RETRY_MAX = 300
+
+# Metrics with a history of recent samples, for the windowed statistics
+HISTORY_FIELDS = ("cpu_percent_total", "memory_percent_total")
+
+# Field of the used space of each category with fill rate forecasts
+FORECAST_FIELDS = {"array": "capacity_used", "disks": "fs_used", "shares": "used"}
+
+# Api client method querying each category
+CATEGORY_QUERIES = {
+    "metrics": "query_metrics",
+    "array": "query_array",
+    "disks": "query_disks",
+    "shares": "query_shares",
+    "vms": "query_vms",
+    "docker": "query_docker_containers",
+}
+
+# Option and default of the polling interval of each category
+CATEGORY_INTERVALS = {
+    "metrics": (CONF_METRICS_INTERVAL, DEFAULT_METRICS_INTERVAL),
+    "array": (CONF_ARRAY_INTERVAL, DEFAULT_ARRAY_INTERVAL),
+    "disks": (CONF_DISKS_INTERVAL, DEFAULT_DISKS_INTERVAL),
+    "shares": (CONF_SHARES_INTERVAL, DEFAULT_SHARES_INTERVAL),
+    "vms": (CONF_VMS_INTERVAL, DEFAULT_VMS_INTERVAL),
+    "docker": (CONF_DOCKER_INTERVAL, DEFAULT_DOCKER_INTERVAL),
+}
+
+# Seconds a category may be queried early, the refresh timer has a resolution of one second
+SCHEDULE_TOLERANCE = 1
+
+# Seconds query results are reused for, refreshes requested right after an update share
+# its results instead of querying the server again
+RESULT_TTL = 2
 
-class UnraidServerData(TypedDict):  # noqa: D101
+# Number of missed intervals after which the data of a category is considered stale
+STALE_INTERVALS = 3
+
+# Factors of the adaptive polling, applied to the configured intervals
+BUSY_SCALE_MIN = 0.25
+IDLE_SCALE = 4
+RETRY_BACKOFF = 2
+MAX_RETRY_INTERVAL = 1800
+# Change of the CPU utilization in percent points that counts as busy
+CPU_CHANGE_THRESHOLD = 10
+# Categories which change rarely while the array is not started, the array itself is
+# polled at its configured interval so a start is noticed in time
+ARRAY_CATEGORIES = ("disks", "shares")
+
+SNAPSHOT_VERSION = 1
+# Seconds to wait before writing the snapshot, coalescing the writes of several updates
+SNAPSHOT_SAVE_DELAY = 300
+
+
+class UnraidServerData(TypedDict, total=False):  # noqa: D101
     metrics: Metrics | None
     array: Array | None
     disks: dict[str, Disk]
@@ -36,6 +143,23 @@ class UnraidServerData(TypedDict):  # noqa: D101
     docker: dict[str, DockerContainer]
 
 
+class UnraidSnapshot(TypedDict):
+    """Last known data, restored on startup."""
+
+    server_info: ServerInfo
+    data: UnraidServerData
+    # Fill rate estimators per category and item, by share name, disk id or "array"
+    forecasts: NotRequired[dict[str, dict[str, FillRateEstimator]]]
+
+
+SNAPSHOT_ADAPTER = TypeAdapter(UnraidSnapshot)
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store of the snapshot of a config entry."""
+    return Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.{entry_id}")
+
+
 class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
     """Update Coordinator."""
 
@@ -46,41 +170,248 @@ class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
     config_entry: UnraidConfigEntry
 
     def __init__(
-        self, hass: HomeAssistant, config_entry: UnraidConfigEntry, api_client: UnraidApiClient
+        self,
+        hass: HomeAssistant,
+        config_entry: UnraidConfigEntry,
+        api_client: UnraidApiClient | None = None,
+        server_info: ServerInfo | None = None,
     ) -> None:
+        self.intervals = {
+            category: config_entry.options.get(option, default)
+            for category, (option, default) in CATEGORY_INTERVALS.items()
+        }
         super().__init__(
             hass,
             logger=_LOGGER,
             config_entry=config_entry,
             name=DOMAIN,
-            update_interval=timedelta(minutes=1),
+            update_interval=timedelta(seconds=self.intervals["metrics"]),
         )
         self.api_client = api_client
-        self.disk_callbacks: set[Callable[[Disk], None]] = set()
-        self.share_callbacks: set[Callable[[Share], None]] = set()
-        self.vm_callbacks: set[Callable[[VirtualMachine], None]] = set()
-        self.docker_callbacks: set[Callable[[DockerContainer], None]] = set()
-
-    async def _async_setup(self) -> None:
+        self.server_info = server_info
+        # Set once there is an api client, the snapshot is restored before connecting
+        self._connected = asyncio.Event()
+        if api_client is not None:
+            self._connected.set()
+        self._api_version_checked = False
         self.known_disks: set[str] = set()
         self.known_shares: set[str] = set()
         self.known_vms: set[str] = set()
         self.known_docker: set[str] = set()
+        self._store = snapshot_store(hass, config_entry.entry_id)
+        self.last_updated: dict[str, float] = {}
+        self.failed_categories: set[str] = set()
+        # Consecutive failures and time of the last attempt of the failed categories
+        self._category_failures: Counter[str] = Counter()
+        self._failed_at: dict[str, float] = {}
+        # Consecutive failures of the combined query, categories are queried separately until
+        # it is retried
+        self._combined_failures = 0
+        self._combined_retry_at = 0.0
+        # Factors of the configured intervals, adapted to the activity of the server
+        self.scales: dict[str, float] = dict.fromkeys(CATEGORY_INTERVALS, 1)
+        self.connection_failures = 0
+        # Optional fields used by the entities, all fields are queried until registered
+        self._required_fields: dict[str, Counter[str]] = {}
+        self._query_fields: dict[str, frozenset[str]] = dict(OPTIONAL_FIELDS)
+        self._refresh_all = False
+        self._requested_categories: set[str] = set()
+        # State when the listeners were last updated, to only notify changed entities
+        self._notified_data: dict[str, Any] | None = None
+        self._notified_success = False
+        self._notified_available: dict[str, bool] = {}
+        self.disk_callbacks: set[Callable[[list[Disk]], None]] = set()
+        self.share_callbacks: set[Callable[[list[Share]], None]] = set()
+        self.vm_callbacks: set[Callable[[list[VirtualMachine]], None]] = set()
+        self.docker_callbacks: set[Callable[[list[DockerContainer]], None]] = set()
+        # Known items and platform callbacks of each category with discovery
+        self._discovery: dict[str, tuple[set[str], set[Callable[[list[Any]], None]]]] = {
+            "disks": (self.known_disks, self.disk_callbacks),
+            "shares": (self.known_shares, self.share_callbacks),
+            "vms": (self.known_vms, self.vm_callbacks),
+            "docker": (self.known_docker, self.docker_callbacks),
+        }
+        # Items found by the running update, passed to the platforms once it is the data
+        self._discovered: dict[str, dict[str, Any]] = {}
+        self.metrics_subscribed = False
+        # Number of VMs and Docker containers per state, with the items they were counted from
+        self._state_counts: dict[str, tuple[dict[str, Any], Counter[str]]] = {}
+        self.metrics_history = {field: MetricHistory() for field in HISTORY_FIELDS}
+        # Kept across reconnects, every new api client records into the same statistics
+        self.api_stats = ApiStats()
+        self.update_time = Histogram(DURATION_BUCKETS)
+        self.listener_time = Histogram(DURATION_BUCKETS)
+        self.forecasts: dict[str, dict[str, FillRateEstimator]] = {
+            category: {} for category in FORECAST_FIELDS
+        }
+        self._category_updaters: dict[str, Callable[[UnraidServerData, Any], None]] = {
+            "metrics": self._update_metrics,
+            "array": self._update_array,
+            "disks": self._update_disks,
+            "shares": self._update_shares,
+            "vms": self._update_vms,
+            "docker": self._update_docker,
+        }
 
-    async def _async_update_data(self) -> UnraidServerData:
+    async def async_restore_snapshot(self) -> ServerInfo | None:
+        """Restore the data and server info saved by the last session."""
+        if (stored := await self._store.async_load()) is None:
+            return None
+        try:
+            snapshot = SNAPSHOT_ADAPTER.validate_python(stored)
+        except ValidationError:
+            _LOGGER.debug("Discarding invalid snapshot")
+            return None
+
+        restored = monotonic()
         data = UnraidServerData()
+        for category in self._enabled_categories():
+            if category in snapshot["data"]:
+                data[category] = snapshot["data"][category]
+                self.last_updated[category] = restored
+        self.known_disks.update(data.get("disks", {}))
+        self.known_shares.update(data.get("shares", {}))
+        self.known_vms.update(data.get("vms", {}))
+        self.known_docker.update(data.get("docker", {}))
+        self.data = data
+        self.server_info = snapshot["server_info"]
+        self.forecasts.update(snapshot.get("forecasts", {}))
+        # The snapshot is only a placeholder, replace all of it with the first update
+        self._refresh_all = True
+        return self.server_info
+
+    def _snapshot(self) -> dict[str, Any]:
+        return SNAPSHOT_ADAPTER.dump_python(
+            UnraidSnapshot(server_info=self.server_info, data=self.data, forecasts=self.forecasts),
+            mode="json",
+        )
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        discovered, self._discovered = self._discovered, {}
+        if not self.last_update_success:
+            # Not part of the data, the items are discovered again by the next update
+            return
+        for category, items in discovered.items():
+            known, callbacks = self._discovery[category]
+            known.update(items)
+            self._do_callback(callbacks, list(items.values()))
+        if self.server_info is not None:
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+    async def async_shutdown(self) -> None:
+        """Cancel any scheduled call and save the snapshot."""
+        await super().async_shutdown()
+        if self.data and self.server_info is not None:
+            await self._store.async_save(self._snapshot())
+
+    async def async_connect(self) -> ServerInfo:
+        """Create the API client and query the server info."""
+        cached_version = self.config_entry.data.get(CONF_API_VERSION)
+        api_client = await self._async_get_api_client(cached_version)
+        try:
+            server_info = await api_client.query_server_info()
+        except UnraidAuthError:
+            raise
+        except (UnraidGraphQLError, ValidationError):
+            if cached_version is None:
+                raise
+            # The server may have been updated since the version was cached
+            _LOGGER.debug("Querying server info failed, revalidating API version")
+            api_client = await self._async_get_api_client(None)
+            server_info = await api_client.query_server_info()
+
+        self.api_client = api_client
+        self._connected.set()
+        self._api_version_checked = cached_version is None
+        if str(api_client.version) != cached_version:
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_API_VERSION: str(api_client.version)},
+            )
+        if self.server_info is not None and server_info.unraid_version != (
+            self.server_info.unraid_version
+        ):
+            device_registry = dr.async_get(self.hass)
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, self.config_entry.entry_id)}
+            ):
+                device_registry.async_update_device(
+                    device.id, sw_version=server_info.unraid_version
+                )
+        self.server_info = server_info
+        return server_info
+
+    async def _async_get_api_client(self, api_version: str | None) -> UnraidApiClient:
+        api_client = await get_api_client(
+            host=self.config_entry.data[CONF_HOST],
+            api_key=self.config_entry.data[CONF_API_KEY],
+            session=async_get_clientsession(self.hass, self.config_entry.data[CONF_VERIFY_SSL]),
+            api_version=AwesomeVersion(api_version) if api_version else None,
+        )
+        api_client.max_in_flight = int(
+            self.config_entry.options.get(CONF_MAX_REQUESTS, DEFAULT_MAX_REQUESTS)
+        )
+        api_client.result_ttl = RESULT_TTL
+        api_client.stats = self.api_stats
+        return api_client
+
+    async def _async_check_api_version(self) -> None:
+        """Reload when the server changed its API version since it was cached, once per session."""
+        if self._api_version_checked:
+            return
+        self._api_version_checked = True
+        try:
+            api_version = await self.api_client.query_api_version()
+        except (ClientError, TimeoutError, UnraidGraphQLError):
+            return
+        if not api_version.valid:
+            # An invalid response tells nothing about the version, keep the cached one
+            _LOGGER.debug("Checking the API version failed, got %r", str(api_version))
+            return
+        if api_version != self.api_client.version:
+            _LOGGER.info("API version changed from %s to %s", self.api_client.version, api_version)
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_API_VERSION: str(api_version)},
+            )
+            self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh of all categories, regardless of their interval."""
+        self._refresh_all = True
+        await super().async_request_refresh()
+
+    async def async_refresh_all(self) -> None:
+        """Refresh all categories now, without waiting for the debouncer."""
+        self._refresh_all = True
+        await self.async_refresh()
+
+    async def async_request_category_refresh(self, category: str) -> None:
+        """Request a refresh of a single category, together with the categories which are due."""
+        self._requested_categories.add(category)
+        await super().async_request_refresh()
+
+    async def _async_update_data(self) -> UnraidServerData:
+        # Categories which are not due keep their previous data
+        data = UnraidServerData(**self.data) if self.data else UnraidServerData()
+        started = monotonic()
+        categories = self._due_categories(started)
+        if not categories:
+            self._schedule_next_update()
+            return data
+        # Retry failed categories after the shortest interval
+        self.update_interval = self._retry_interval()
+        queried = self._plan_queries(categories)
         try:
-            async with asyncio.TaskGroup() as tg:
-                tg.create_task(self._update_metrics(data))
-                tg.create_task(self._update_array(data))
-                if self.config_entry.options.get(CONF_DRIVES, True):
-                    tg.create_task(self._update_disks(data))
-                if self.config_entry.options.get(CONF_SHARES, True):
-                    tg.create_task(self._update_shares(data))
-                if self.config_entry.options.get(CONF_VMS, False):
-                    tg.create_task(self._update_vms(data))
-                if self.config_entry.options.get(CONF_DOCKER, False):
-                    tg.create_task(self._update_docker(data))
+            if self.api_client is None:
+                await self.async_connect()
+            if not queried:
+                updated = []
+            elif self.config_entry.options.get(CONF_COMBINED_QUERY, True):
+                updated = await self._update_combined(data, queried)
+            else:
+                updated = await self._update_categories(data, queried)
 
         except* ClientConnectorSSLError as exc:
             _LOGGER.debug("Update: SSL error: %s", str(exc))
@@ -94,6 +425,9 @@ class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
             TimeoutError,
         ) as exc:
             _LOGGER.debug("Update: Connection error: %s", str(exc))
+            # Back off while the server is unreachable
+            self.connection_failures += 1
+            self.update_interval = self._retry_interval()
             raise UpdateFailed(
                 translation_domain=DOMAIN,
                 translation_key="cannot_connect",
@@ -134,77 +468,492 @@ class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
                 },
             ) from exc
 
+        # Skipped categories can not have changed
+        updated = [*updated, *(category for category in categories if category not in queried)]
+        for category in updated:
+            self.last_updated[category] = started
+        self._keep_streamed_metrics(data)
+        self.connection_failures = 0
+        self._adapt_intervals(data, updated)
+        self._schedule_next_update()
+        self.update_time.add(monotonic() - started)
         return data
 
-    async def _update_metrics(self, data: UnraidServerData) -> None:
-        data["metrics"] = await self.api_client.query_metrics()
+    def _keep_streamed_metrics(self, data: UnraidServerData) -> None:
+        """Keep the metrics streamed while the queries ran, they are newer than the copied ones."""
+        if self.metrics_subscribed and self.data and "metrics" in self.data:
+            data["metrics"] = self.data["metrics"]
 
-    async def _update_array(self, data: UnraidServerData) -> None:
-        data["array"] = await self.api_client.query_array()
+    def interval(self, category: str) -> float:
+        """Return the current polling interval of a category in seconds."""
+        return max(self.intervals[category] * self.scales[category], MIN_INTERVAL)
 
-    async def _update_disks(self, data: UnraidServerData) -> None:
-        disks = {}
-        query_response = await self.api_client.query_disks()
+    def _retry_interval(self) -> timedelta:
+        base = min(self.interval(category) for category in self._polled_categories())
+        backoff = base * RETRY_BACKOFF**self.connection_failures
+        return timedelta(seconds=min(backoff, max(base, MAX_RETRY_INTERVAL)))
+
+    def _adapt_intervals(self, data: UnraidServerData, updated: Collection[str]) -> None:
+        """Poll changing categories faster and the categories of a stopped array slower."""
+        previous = self.data or UnraidServerData()
+        if "metrics" in updated:
+            old, new = previous.get("metrics"), data.get("metrics")
+            self._adapt_busy(
+                "metrics",
+                changed=old is not None
+                and new is not None
+                and new.cpu_percent_total is not None
+                and old.cpu_percent_total is not None
+                and abs(new.cpu_percent_total - old.cpu_percent_total) >= CPU_CHANGE_THRESHOLD,
+            )
+        for category in ("vms", "docker"):
+            if category in updated and category in previous:
+                old_items, new_items = previous[category], data[category]
+                self._adapt_busy(
+                    category,
+                    changed=old_items.keys() != new_items.keys()
+                    or any(item.state != old_items[item.id].state for item in new_items.values()),
+                )
+        if "array" in updated and (array := data.get("array")) is not None:
+            scale = 1 if array.state == ArrayState.STARTED else IDLE_SCALE
+            for category in ARRAY_CATEGORIES:
+                self.scales[category] = scale
+
+    def _adapt_busy(self, category: str, *, changed: bool) -> None:
+        # Halve the interval while changing, then double it back to the configured one
+        if changed:
+            self.scales[category] = max(self.scales[category] / 2, BUSY_SCALE_MIN)
+        else:
+            self.scales[category] = min(self.scales[category] * 2, 1)
+
+    def category_available(self, category: str) -> bool:
+        """Return if the data of a category is recent enough to be shown."""
+        if category not in self.last_updated:
+            return False
+        age = monotonic() - self.last_updated[category]
+        return age < self.interval(category) * STALE_INTERVALS
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """
+        Update the listeners whose category or item changed since the last update.
+
+        Listeners registered with a (category, item id) context are only called when
+        that item, or for an item id of None anything in the category, changed.
+        """
+        previous = self._notified_data
+        available = {category: self.category_available(category) for category in CATEGORY_QUERIES}
+        changes = self._changed_items(previous, available)
+        notify_all = previous is None or self.last_update_success != self._notified_success
+
+        self._notified_data = dict(self.data) if self.data else None
+        self._notified_success = self.last_update_success
+        self._notified_available = available
+
+        dispatch_started = monotonic()
+        for update_callback, context in list(self._listeners.values()):
+            if notify_all or context is None:
+                update_callback()
+                continue
+            category, item_id = context
+            changed = changes.get(category)
+            if changed is None:
+                continue
+            if not changed or item_id is None or item_id in changed:
+                update_callback()
+        self.listener_time.add(monotonic() - dispatch_started)
+
+    def _changed_items(
+        self, previous: dict[str, Any] | None, available: dict[str, bool]
+    ) -> dict[str, set[str] | None]:
+        """
+        Return the changed item ids per category.
 
+        An empty set means the whole category changed, None means nothing changed.
+        """
+        if previous is None or self.data is None:
+            return {}
+        changes: dict[str, set[str] | None] = {}
+        for category in CATEGORY_QUERIES:
+            if available[category] != self._notified_available.get(category):
+                changes[category] = set()
+                continue
+            old = previous.get(category)
+            new = self.data.get(category)
+            # Unchanged categories and items keep the same object
+            if old is new:
+                changes[category] = None
+            elif isinstance(old, dict) and isinstance(new, dict):
+                changed = {item_id for item_id, item in new.items() if old.get(item_id) is not item}
+                changed.update(old.keys() - new.keys())
+                changes[category] = changed or None
+            else:
+                changes[category] = None if old == new else set()
+        return changes
+
+    def _polled_categories(self) -> list[str]:
+        categories = self._enabled_categories()
+        if self.metrics_subscribed:
+            # Metrics are pushed by the subscription
+            categories.remove("metrics")
+        return categories
+
+    def _due_categories(self, now: float) -> list[str]:
+        categories = self._polled_categories()
+        requested = self._requested_categories
+        self._requested_categories = set()
+        if self._refresh_all:
+            self._refresh_all = False
+            return categories
+        return [
+            category
+            for category in categories
+            if category in requested
+            or (category not in self.last_updated and category not in self._failed_at)
+            or now >= self._next_update(category, now) - SCHEDULE_TOLERANCE
+        ]
+
+    def _next_update(self, category: str, now: float) -> float:
+        """Return when a category is due, failed categories back off from their last attempt."""
+        if (failed_at := self._failed_at.get(category)) is not None:
+            backoff = self.interval(category) * RETRY_BACKOFF ** (
+                self._category_failures[category] - 1
+            )
+            return failed_at + min(backoff, max(self.interval(category), MAX_RETRY_INTERVAL))
+        return self.last_updated.get(category, now) + self.interval(category)
+
+    def _plan_queries(self, categories: list[str]) -> list[str]:
+        """
+        Return the due categories worth querying, planned from the last known state.
+
+        Shares are skipped while the array is not started. Only the optional fields used by
+        the entities are selected, and the filesystem usage of the disks only while the
+        array is started and one of its disks with a filesystem is spinning. Fields which
+        are not queried keep their last known value.
+        """
+        data = self.data or UnraidServerData()
+        array = data.get("array")
+        array_started = array is None or array.state == ArrayState.STARTED
+        disks = data.get("disks")
+        disk_fs_usage = array_started and (
+            not disks
+            or any(disk.is_spinning for disk in disks.values() if disk.type != DiskType.Parity)
+        )
+        for category, fields in OPTIONAL_FIELDS.items():
+            if (required := self._required_fields.get(category)) is not None:
+                fields = fields & {field for field, count in required.items() if count > 0}  # noqa: PLW2901
+            if category == "disks" and not disk_fs_usage:
+                fields -= DISK_FS_FIELDS  # noqa: PLW2901
+            self._query_fields[category] = fields
+        if array_started:
+            return categories
+        return [category for category in categories if category != "shares"]
+
+    @callback
+    def async_require_fields(self, category: str, fields: Collection[str]) -> CALLBACK_TYPE:
+        """
+        Register optional fields of a category used by an entity.
+
+        Once a category has registrations only their fields are queried. Returns a
+        callback removing the registration.
+        """
+        required = self._required_fields.setdefault(category, Counter())
+        required.update(fields)
+
+        @callback
+        def remove() -> None:
+            required.subtract(fields)
+
+        return remove
+
+    def _schedule_next_update(self) -> None:
+        """Wake up when the next category is due."""
+        now = monotonic()
+        next_update = min(
+            (self._next_update(category, now) for category in self._polled_categories()),
+            default=now + self.interval("metrics"),
+        )
+        self.update_interval = timedelta(seconds=max(next_update - now, MIN_INTERVAL))
+
+    def _enabled_categories(self) -> list[str]:
+        categories = ["metrics", "array"]
+        if self.config_entry.options.get(CONF_DRIVES, True):
+            categories.append("disks")
+        if self.config_entry.options.get(CONF_SHARES, True):
+            categories.append("shares")
+        if self.config_entry.options.get(CONF_VMS, False):
+            categories.append("vms")
+        if self.config_entry.options.get(CONF_DOCKER, False):
+            categories.append("docker")
+        return categories
+
+    async def _update_combined(self, data: UnraidServerData, categories: list[str]) -> list[str]:
+        if monotonic() < self._combined_retry_at:
+            return await self._update_categories(data, categories)
+        try:
+            query_response = await self.api_client.query_combined(
+                categories,
+                fields={
+                    category: self._query_fields[category]
+                    for category in categories
+                    if category in OPTIONAL_FIELDS
+                },
+            )
+        except UnraidAuthError:
+            raise
+        except (UnraidGraphQLError, ValidationError) as exc:
+            # A single failing category fails the whole query, query them one by one instead
+            _LOGGER.debug("Update: Combined query failed, querying separately: %s", str(exc))
+            base = min(self.interval(category) for category in self._polled_categories())
+            backoff = base * RETRY_BACKOFF**self._combined_failures
+            self._combined_failures += 1
+            self._combined_retry_at = monotonic() + min(backoff, max(base, MAX_RETRY_INTERVAL))
+            return await self._update_categories(data, categories)
+        self._combined_failures = 0
+        for category, value in query_response.items():
+            self._category_updaters[category](data, value)
+        self._categories_recovered(categories)
+        return categories
+
+    async def _update_categories(self, data: UnraidServerData, categories: list[str]) -> list[str]:
+        """Query categories independently, keeping the previous data of failed categories."""
+        results = await asyncio.gather(
+            *(self._update_category(data, category) for category in categories),
+            return_exceptions=True,
+        )
+        updated = []
+        errors: dict[str, Exception] = {}
+        for category, result in zip(categories, results, strict=True):
+            if isinstance(result, Exception):
+                errors[category] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                updated.append(category)
+
+        if any(
+            isinstance(exc, (UnraidGraphQLError, ValidationError))
+            and not isinstance(exc, UnraidAuthError)
+            for exc in errors.values()
+        ):
+            await self._async_check_api_version()
+
+        # Authentication errors and complete failures still fail the update, unless only
+        # categories which were failing already were queried
+        for exc in errors.values():
+            if isinstance(exc, UnraidAuthError):
+                raise exc
+        if errors and not updated and not errors.keys() <= self.failed_categories:
+            raise next(iter(errors.values()))
+
+        now = monotonic()
+        for category, exc in errors.items():
+            self._category_failures[category] += 1
+            self._failed_at[category] = now
+            if category not in self.failed_categories:
+                self.failed_categories.add(category)
+                _LOGGER.warning("Error fetching %s data: %s", category, repr(exc))
+        self._categories_recovered(updated)
+        return updated
+
+    def _categories_recovered(self, categories: list[str]) -> None:
+        for category in categories:
+            if category in self.failed_categories:
+                self.failed_categories.discard(category)
+                self._category_failures.pop(category, None)
+                self._failed_at.pop(category, None)
+                _LOGGER.info("Fetching %s data recovered", category)
+
+    async def _update_category(self, data: UnraidServerData, category: str) -> None:
+        query = getattr(self.api_client, CATEGORY_QUERIES[category])
+        if category in OPTIONAL_FIELDS:
+            result = await query(fields=self._query_fields[category])
+        else:
+            result = await query()
+        self._category_updaters[category](data, result)
+
+    def _merge_item(self, category: str, new: _ItemT, old: _ItemT | None) -> _ItemT:
+        """
+        Return the item to keep for a queried item.
+
+        Fields which were not queried keep their last known value, and an unchanged item
+        is the previous object, so it keeps its identity across updates.
+        """
+        if old is None:
+            return new
+        if category in OPTIONAL_FIELDS and (
+            unqueried := OPTIONAL_FIELDS[category] - self._query_fields[category]
+        ):
+            new = replace(new, **{field: getattr(old, field) for field in unqueried})
+        return old if new == old else new
+
+    def _update_metrics(self, data: UnraidServerData, metrics: Metrics) -> None:
+        if self.metrics_subscribed:
+            # Queried before the subscription started, the streamed metrics are newer
+            return
+        self._record_metrics(metrics, self._query_fields["metrics"])
+        data["metrics"] = self._merge_item("metrics", metrics, data.get("metrics"))
+
+    def _record_metrics(self, metrics: Metrics, fields: Collection[str]) -> None:
+        """Add the queried metrics to their history."""
+        now = monotonic()
+        for field, history in self.metrics_history.items():
+            if field in fields and (value := getattr(metrics, field)) is not None:
+                history.append(now, value)
+
+    def _update_array(self, data: UnraidServerData, array: Array) -> None:
+        data["array"] = self._merge_item("array", array, data.get("array"))
+        self._add_usage_sample("array", "array", array.capacity_used)
+
+    def _add_usage_sample(self, category: str, key: str, used: int | None) -> None:
+        """Add the queried used space of a storage to its fill rate estimator."""
+        if used is None or FORECAST_FIELDS[category] not in self._query_fields[category]:
+            return
+        self.forecasts[category].setdefault(key, FillRateEstimator()).add(time(), used)
+
+    def _update_disks(self, data: UnraidServerData, query_response: list[Disk]) -> None:
+        previous = data.get("disks", {})
+        disks = {}
+        new_disks = {}
         for disk in query_response:
+            disk = self._merge_item("disks", disk, previous.get(disk.id))  # noqa: PLW2901
             disks[disk.id] = disk
+            self._add_usage_sample("disks", disk.id, disk.fs_used)
             if disk.id not in self.known_disks:
-                self.known_disks.add(disk.id)
-                self._do_callback(self.disk_callbacks, disk)
+                new_disks[disk.id] = disk
+        if disks == previous:
+            # Nothing changed, keep the previous dict as well
+            disks = previous
         data["disks"] = disks
+        if new_disks:
+            self._discovered["disks"] = new_disks
 
-    async def _update_shares(self, data: UnraidServerData) -> None:
+    def _update_shares(self, data: UnraidServerData, query_response: list[Share]) -> None:
+        previous = data.get("shares", {})
         shares = {}
-        query_response = await self.api_client.query_shares()
-
+        new_shares = {}
         for share in query_response:
+            share = self._merge_item("shares", share, previous.get(share.name))  # noqa: PLW2901
             shares[share.name] = share
+            self._add_usage_sample("shares", share.name, share.used)
             if share.name not in self.known_shares:
-                self.known_shares.add(share.name)
-                self._do_callback(self.share_callbacks, share)
+                new_shares[share.name] = share
+        if shares == previous:
+            shares = previous
         data["shares"] = shares
+        if new_shares:
+            self._discovered["shares"] = new_shares
 
-    async def _update_vms(self, data: UnraidServerData) -> None:
+    def _update_vms(self, data: UnraidServerData, query_response: list[VirtualMachine]) -> None:
+        previous = data.get("vms", {})
         vms = {}
-        query_response = await self.api_client.query_vms()
-
+        new_vms = {}
+        states: Counter[str] = Counter()
         for vm in query_response:
+            vm = self._merge_item("vms", vm, previous.get(vm.id))  # noqa: PLW2901
             vms[vm.id] = vm
+            states[vm.state] += 1
             if vm.id not in self.known_vms:
-                self.known_vms.add(vm.id)
-                self._do_callback(self.vm_callbacks, vm)
+                new_vms[vm.id] = vm
+        if vms == previous:
+            vms = previous
         data["vms"] = vms
+        if new_vms:
+            self._discovered["vms"] = new_vms
+        self._state_counts["vms"] = (vms, states)
 
-    async def _update_docker(self, data: UnraidServerData) -> None:
+    def _update_docker(self, data: UnraidServerData, query_response: list[DockerContainer]) -> None:
+        previous = data.get("docker", {})
         docker = {}
-        query_response = await self.api_client.query_docker_containers()
-
+        new_containers = {}
+        states: Counter[str] = Counter()
         for container in query_response:
+            container = self._merge_item("docker", container, previous.get(container.id))  # noqa: PLW2901
             docker[container.id] = container
+            states[container.state] += 1
             if container.id not in self.known_docker:
-                self.known_docker.add(container.id)
-                self._do_callback(self.docker_callbacks, container)
+                new_containers[container.id] = container
+        if docker == previous:
+            docker = previous
         data["docker"] = docker
+        if new_containers:
+            self._discovered["docker"] = new_containers
+        self._state_counts["docker"] = (docker, states)
+
+    def state_counts(self, category: str) -> Counter[str]:
+        """
+        Return the number of VMs or Docker containers per state.
+
+        The states are counted once per update, and only counted again when the items
+        were replaced since, by a mutation or the restored snapshot.
+        """
+        items = self.data[category]
+        counted = self._state_counts.get(category)
+        if counted is None or counted[0] is not items:
+            counted = (items, Counter(item.state for item in items.values()))
+            self._state_counts[category] = counted
+        return counted[1]
+
+    def subscribe_disks(self, callback: Callable[[list[Disk]], None]) -> None:
+        self._subscribe("disks", callback)
+
+    def subscribe_shares(self, callback: Callable[[list[Share]], None]) -> None:
+        self._subscribe("shares", callback)
+
+    def subscribe_vms(self, callback: Callable[[list[VirtualMachine]], None]) -> None:
+        self._subscribe("vms", callback)
+
+    def subscribe_docker(self, callback: Callable[[list[DockerContainer]], None]) -> None:
+        self._subscribe("docker", callback)
+
+    def _subscribe(self, category: str, callback: Callable[[list[Any]], None]) -> None:
+        """Register a platform callback and pass it the current items of the category."""
+        self._discovery[category][1].add(callback)
+        # Known items which disappeared since are not in the data anymore
+        if items := list((self.data or {}).get(category, {}).values()):
+            self._do_callback([callback], items)
 
-    def subscribe_disks(self, callback: Callable[[Disk], None]) -> None:
-        self.disk_callbacks.add(callback)
-        for disk_id in self.known_disks:
-            self._do_callback([callback], self.data["disks"][disk_id])
+    @callback
+    def async_start_metrics_subscription(self) -> None:
+        """Stream metrics from the server, polling them while the subscription is down."""
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_subscribe_metrics(), f"{DOMAIN} metrics subscription"
+        )
 
-    def subscribe_shares(self, callback: Callable[[Share], None]) -> None:
-        self.share_callbacks.add(callback)
-        for share_name in self.known_shares:
-            self._do_callback([callback], self.data["shares"][share_name])
+    async def _async_subscribe_metrics(self) -> None:
+        retries = 0
+        while True:
+            await self._connected.wait()
+            try:
+                async for metrics in self.api_client.subscribe_metrics():
+                    if not self.metrics_subscribed:
+                        _LOGGER.debug("Metrics subscription active")
+                        self.metrics_subscribed = True
+                        retries = 0
+                    self._async_set_metrics(metrics)
+            except (ClientError, TimeoutError, UnraidGraphQLError, ValidationError) as exc:
+                _LOGGER.debug("Metrics subscription failed: %s", str(exc))
+            except Exception:
+                # A malformed message must not end the subscription for good
+                _LOGGER.exception("Unexpected error in the metrics subscription")
 
-    def subscribe_vms(self, callback: Callable[[VirtualMachine], None]) -> None:
-        self.vm_callbacks.add(callback)
-        for vm_id in self.known_vms:
-            self._do_callback([callback], self.data["vms"][vm_id])
+            if self.metrics_subscribed:
+                self.metrics_subscribed = False
+                # The next update was scheduled while streaming, poll the metrics right away
+                await self.async_request_category_refresh("metrics")
+            delay = min(SUBSCRIPTION_RETRY_MIN * 2**retries, SUBSCRIPTION_RETRY_MAX)
+            retries += 1
+            _LOGGER.debug("Polling metrics, retrying subscription in %s seconds", delay)
+            await asyncio.sleep(delay)
 
-    def subscribe_docker(self, callback: Callable[[DockerContainer], None]) -> None:
-        self.docker_callbacks.add(callback)
-        for container_id in self.known_docker:
-            self._do_callback([callback], self.data["docker"][container_id])
+    @callback
+    def _async_set_metrics(self, metrics: Metrics) -> None:
+        if self.data is None:
+            return
+        self._record_metrics(metrics, HISTORY_FIELDS)
+        self.data["metrics"] = metrics
+        self.last_updated["metrics"] = monotonic()
+        self.async_update_listeners()
 
     async def async_vm_action(self, vm_id: str, action: str) -> bool:
         """Execute an action on a VM."""
@@ -217,11 +966,13 @@ class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
             "force_stop": self.api_client.vm_force_stop,
         }
         if action not in actions:
-            raise ValueError(f"Unknown VM action: {action}")
+            msg = f"Unknown VM action: {action}"
+            raise ValueError(msg)
 
-        result = await actions[action](vm_id)
-        await self.async_request_refresh()
-        return result
+        state = await actions[action](vm_id)
+        self._async_patch_states("vms", {vm_id: state})
+        await self.async_request_category_refresh("vms")
+        return state is not None
 
     async def async_docker_action(self, container_id: str, action: str) -> bool:
         """Execute an action on a Docker container."""
@@ -230,17 +981,68 @@ class UnraidDataUpdateCoordinator(DataUpdateCoordinator[UnraidServerData]):
             "stop": self.api_client.docker_stop,
         }
         if action not in actions:
-            raise ValueError(f"Unknown Docker action: {action}")
+            msg = f"Unknown Docker action: {action}"
+            raise ValueError(msg)
+
+        state = await actions[action](container_id)
+        self._async_patch_states("docker", {container_id: state})
+        await self.async_request_category_refresh("docker")
+        return state is not None
+
+    async def async_vm_action_many(self, vm_ids: Collection[str], action: str) -> dict[str, bool]:
+        """Execute an action on many VMs with one request, returning the success per VM."""
+        if action not in VM_ACTIONS:
+            msg = f"Unknown VM action: {action}"
+            raise ValueError(msg)
+
+        try:
+            states = await self.api_client.vm_action_many(action, vm_ids)
+            self._async_patch_states("vms", states)
+        finally:
+            # Items may have changed even if the request failed
+            await self.async_request_category_refresh("vms")
+        return {vm_id: state is not None for vm_id, state in states.items()}
+
+    async def async_docker_action_many(
+        self, container_ids: Collection[str], action: str
+    ) -> dict[str, bool]:
+        """Execute an action on many Docker containers with one request."""
+        actions = {
+            "start": self.api_client.docker_start_many,
+            "stop": self.api_client.docker_stop_many,
+        }
+        if action not in actions:
+            msg = f"Unknown Docker action: {action}"
+            raise ValueError(msg)
 
-        result = await actions[action](container_id)
-        await self.async_request_refresh()
-        return result
+        try:
+            states = await actions[action](container_ids)
+            self._async_patch_states("docker", states)
+        finally:
+            await self.async_request_category_refresh("docker")
+        return {container_id: state is not None for container_id, state in states.items()}
+
+    @callback
+    def _async_patch_states(self, category: str, states: Mapping[str, Any]) -> None:
+        """Update items with the states of a mutation, notifying only their entities."""
+        items = self.data.get(category)
+        if items is None:
+            return
+        changes = {
+            item_id: replace(items[item_id], state=state)
+            for item_id, state in states.items()
+            if state is not None and item_id in items
+        }
+        if not changes:
+            return
+        self.data[category] = {**items, **changes}
+        self.async_update_listeners()
 
     def _do_callback(
         self, callbacks: set[Callable[..., None]], *args: tuple[Any], **kwargs: dict[Any]
     ) -> None:
-        for callback in callbacks:
+        for callback_func in callbacks:
             try:
-                callback(*args, **kwargs)
+                callback_func(*args, **kwargs)
             except Exception:
                 _LOGGER.exception("Error in callback")
@@ -0,0 +1,37 @@
+"""Diagnostics support for Unraid."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY, CONF_HOST
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from . import UnraidConfigEntry
+
+TO_REDACT = {CONF_API_KEY, CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,  # noqa: ARG001
+    config_entry: UnraidConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = config_entry.runtime_data.coordinator
+    return {
+        "entry": {
+            "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+            "options": dict(config_entry.options),
+        },
+        "intervals": {
+            category: coordinator.interval(category) for category in coordinator.intervals
+        },
+        "connection_failures": coordinator.connection_failures,
+        "metrics_subscribed": coordinator.metrics_subscribed,
+        "update_time": coordinator.update_time.as_dict(),
+        "listener_time": coordinator.listener_time.as_dict(),
+        "requests": coordinator.api_stats.as_dict(),
+    }
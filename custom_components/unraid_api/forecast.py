@@ -0,0 +1,75 @@
+"""Fill rate forecasts of the array, disks and shares."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+SECONDS_PER_DAY = 86400
+# Days after which the weight of a sample is halved
+HALF_LIFE_DAYS = 7
+# Relative size below which the spread of the sample times is treated as zero
+MIN_SPREAD = 1e-9
+
+
+@dataclass(slots=True)
+class FillRateEstimator:
+    """
+    Incremental estimate of the fill rate of a storage.
+
+    Fits a least squares line through the used space over time, with exponentially
+    decaying weights so recent changes count more. Only the weighted sums are kept,
+    relative to the latest sample and the first used space, so each sample is added
+    in constant time without losing precision.
+    """
+
+    # Timestamp of the latest sample, the times of the sums are days before it
+    timestamp: float | None = None
+    # Used space of the first sample, the values of the sums are relative to it
+    offset: float = 0
+    weight: float = 0
+    time: float = 0
+    value: float = 0
+    time_squared: float = 0
+    time_value: float = 0
+
+    def add(self, timestamp: float, used: float) -> None:
+        """Add a sample of the used space."""
+        if self.timestamp is None:
+            self.offset = used
+        else:
+            elapsed = (timestamp - self.timestamp) / SECONDS_PER_DAY
+            if elapsed <= 0:
+                return
+            # Move the origin of the times to the new sample
+            self.time_squared += elapsed * (elapsed * self.weight - 2 * self.time)
+            self.time_value -= elapsed * self.value
+            self.time -= elapsed * self.weight
+            decay = 0.5 ** (elapsed / HALF_LIFE_DAYS)
+            self.weight *= decay
+            self.time *= decay
+            self.value *= decay
+            self.time_squared *= decay
+            self.time_value *= decay
+        self.timestamp = timestamp
+        # The time of the new sample is zero, it only adds to the weight and the value
+        self.weight += 1
+        self.value += used - self.offset
+
+    def rate(self) -> float | None:
+        """Return the fill rate per day, None until samples of different times were added."""
+        spread = self.weight * self.time_squared - self.time**2
+        if spread <= MIN_SPREAD * self.weight * self.time_squared:
+            return None
+        return (self.weight * self.time_value - self.time * self.value) / spread
+
+
+def days_until_full(
+    estimator: FillRateEstimator | None, used: float | None, total: float | None
+) -> float | None:
+    """Return the days until a storage is full at its estimated fill rate."""
+    if estimator is None or used is None or not total:
+        return None
+    rate = estimator.rate()
+    if rate is None or rate <= 0:
+        return None
+    return max(total - used, 0) / rate
@@ -0,0 +1,87 @@
+"""History of recent metric samples."""
+
+from __future__ import annotations
+
+import numpy as np
+
+# Seconds of samples the statistics are computed over
+HISTORY_WINDOW = 300
+# Enough for one sample per second, as pushed by the metrics subscription
+HISTORY_SIZE = 512
+
+
+class MetricHistory:
+    """
+    Fixed size ring buffer of timestamped samples of a metric.
+
+    The statistics cover the samples of the last window seconds, up to the latest sample.
+    The window is extracted once per append and shared by all statistics.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE, window: float = HISTORY_WINDOW) -> None:
+        self.size = size
+        self.window = window
+        self._times = np.zeros(size)
+        self._values = np.zeros(size)
+        self._next = 0
+        self._count = 0
+        self._samples: tuple[np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, replacing the oldest one when full."""
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+        self._samples = None
+
+    def samples(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the times and values of the samples in the window, oldest first."""
+        if self._samples is None:
+            if self._count < self.size:
+                times = self._times[: self._count]
+                values = self._values[: self._count]
+            else:
+                times = np.concatenate((self._times[self._next :], self._times[: self._next]))
+                values = np.concatenate((self._values[self._next :], self._values[: self._next]))
+            if times.size:
+                first = int(np.searchsorted(times, times[-1] - self.window))
+                times, values = times[first:], values[first:]
+            self._samples = times, values
+        return self._samples
+
+    def mean(self) -> float | None:
+        """Return the mean of the window."""
+        _, values = self.samples()
+        if not values.size:
+            return None
+        return float(np.mean(values))
+
+    def maximum(self) -> float | None:
+        """Return the maximum of the window."""
+        _, values = self.samples()
+        if not values.size:
+            return None
+        return float(np.max(values))
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a percentile of the window, interpolated between the closest samples."""
+        _, values = self.samples()
+        if not values.size:
+            return None
+        return float(np.percentile(values, percent))
+
+    def rate(self) -> float | None:
+        """Return the change per minute of the window, as the least squares slope."""
+        times, values = self.samples()
+        if times.size < 2:  # noqa: PLR2004
+            return None
+        # Centered on the means, the large monotonic timestamps do not lose precision
+        centered = times - np.mean(times)
+        variance = np.dot(centered, centered)
+        if variance == 0:
+            return None
+        return float(np.dot(centered, values - np.mean(values)) / variance * 60)
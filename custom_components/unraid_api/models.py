@@ -2,8 +2,38 @@
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
 from enum import StrEnum
+from typing import Annotated, Any
+
+from pydantic import AfterValidator, ConfigDict, Field, ValidationInfo, field_validator
+from pydantic.alias_generators import to_camel
+
+# Lets pydantic validate API responses directly into the dataclasses,
+# field names are accepted as well to restore the saved snapshot
+API_CONFIG = ConfigDict(alias_generator=to_camel, validate_by_name=True)
+
+# Strings repeated in every update share one object instead of a copy per update
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
+
+# Fields which are only queried while an entity uses them, None when not queried yet
+OPTIONAL_FIELDS: dict[str, frozenset[str]] = {
+    "metrics": frozenset(
+        {
+            "memory_free",
+            "memory_total",
+            "memory_active",
+            "memory_available",
+            "memory_percent_total",
+            "cpu_percent_total",
+        }
+    ),
+    "array": frozenset({"capacity_free", "capacity_used", "capacity_total"}),
+    "disks": frozenset({"temp", "fs_size", "fs_free", "fs_used"}),
+    "shares": frozenset({"free", "used", "size", "allocator", "floor"}),
+}
+DISK_FS_FIELDS = frozenset({"fs_size", "fs_free", "fs_used"})
 
 
 class DiskStatus(StrEnum):  # noqa: D101
@@ -39,7 +69,7 @@ class ArrayState(StrEnum):  # noqa: D101
     NO_DATA_DISKS = "NO_DATA_DISKS"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ServerInfo:
     """Server Info."""
 
@@ -48,53 +78,58 @@ class ServerInfo:
     unraid_version: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Metrics:
     """Metrics."""
 
-    memory_free: int
-    memory_total: int
-    memory_active: int
-    memory_available: int
-    memory_percent_total: float
-    cpu_percent_total: float
+    memory_free: int | None = None
+    memory_total: int | None = None
+    memory_active: int | None = None
+    memory_available: int | None = None
+    memory_percent_total: float | None = None
+    cpu_percent_total: float | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Share:
     """Shares."""
 
-    name: str
-    free: int
-    used: int
-    size: int
-    allocator: str
-    floor: str
+    __pydantic_config__ = API_CONFIG
+
+    name: InternedStr
+    free: int | None = None
+    used: int | None = None
+    size: int | None = None
+    allocator: InternedStr | None = None
+    floor: InternedStr | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Disk:
     """Disk."""
 
-    name: str
+    __pydantic_config__ = API_CONFIG
+
+    name: InternedStr
     status: DiskStatus
-    temp: int | None
-    fs_size: int | None
-    fs_free: int | None
-    fs_used: int | None
     type: DiskType
-    id: str
+    id: InternedStr
     is_spinning: bool
+    temp: int | None = None
+    # Not available for parity disks
+    fs_size: int | None = None
+    fs_free: int | None = None
+    fs_used: int | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Array:
     """Array."""
 
     state: ArrayState
-    capacity_free: int
-    capacity_used: int
-    capacity_total: int
+    capacity_free: int | None = None
+    capacity_used: int | None = None
+    capacity_total: int | None = None
 
 
 class VmState(StrEnum):  # noqa: D101
@@ -117,21 +152,33 @@ class DockerState(StrEnum):  # noqa: D101
     DEAD = "DEAD"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VirtualMachine:
     """Virtual Machine."""
 
-    id: str
-    name: str
+    __pydantic_config__ = API_CONFIG
+
+    id: InternedStr
+    name: InternedStr
     state: VmState
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DockerContainer:
     """Docker Container."""
 
-    id: str
-    name: str
+    __pydantic_config__ = API_CONFIG
+
+    id: InternedStr
+    name: Annotated[InternedStr, Field(validation_alias="names")]
     state: DockerState
-    image: str
-    autostart: bool
+    image: InternedStr
+    autostart: Annotated[bool, Field(validation_alias="autoStart")]
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def _first_name(cls, names: Any, info: ValidationInfo) -> Any:
+        """Use the first container name, the API returns all names prefixed with "/"."""
+        if isinstance(names, list):
+            return names[0].lstrip("/") if names else info.data.get("id")
+        return names
@@ -0,0 +1,97 @@
+"""Profiling of the refresh cycles of the coordinator."""
+
+from __future__ import annotations
+
+import cProfile
+import pstats
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .coordinator import UnraidDataUpdateCoordinator
+
+# Functions reported besides the ones of the integration
+REPORTED_FUNCTIONS = ("async_write_ha_state", "validate_json")
+# Number of allocation sites written to the memory report
+MEMORY_TOP = 50
+
+PACKAGE_DIR = str(Path(__file__).parent)
+
+
+async def async_profile_refresh(
+    hass: HomeAssistant,
+    coordinator: UnraidDataUpdateCoordinator,
+    cycles: int,
+    *,
+    memory: bool,
+) -> dict[str, Any]:
+    """
+    Run full refresh cycles under cProfile and write the results to the config directory.
+
+    The profiler runs on the event loop, so everything the loop runs during the cycles
+    is recorded. Awaiting coroutines count as one call per resumption. Returns the paths
+    of the written files and the timings of the functions of the integration, the
+    entity state writes and the validation of the responses.
+    """
+    prefix = hass.config.path(f"{DOMAIN}_profile_{dt_util.now():%Y%m%d_%H%M%S}")
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    # Snapshots of a large process take a while, take them in the executor
+    before = await hass.async_add_executor_job(tracemalloc.take_snapshot) if memory else None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            for _ in range(cycles):
+                await coordinator.async_refresh_all()
+        finally:
+            profiler.disable()
+        after = await hass.async_add_executor_job(tracemalloc.take_snapshot) if memory else None
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    result: dict[str, Any] = {"cycles": cycles, "stats_file": f"{prefix}.cprof"}
+    if before is not None and after is not None:
+        result["memory_file"] = f"{prefix}_memory.txt"
+    result["functions"] = await hass.async_add_executor_job(
+        _write_results, profiler, prefix, before, after
+    )
+    return result
+
+
+def _write_results(
+    profiler: cProfile.Profile,
+    prefix: str,
+    before: tracemalloc.Snapshot | None,
+    after: tracemalloc.Snapshot | None,
+) -> dict[str, dict[str, float]]:
+    profiler.dump_stats(f"{prefix}.cprof")
+    if before is not None and after is not None:
+        differences = after.compare_to(before, "lineno")[:MEMORY_TOP]
+        Path(f"{prefix}_memory.txt").write_text(
+            "\n".join(str(difference) for difference in differences) + "\n"
+        )
+    return function_timings(pstats.Stats(profiler))
+
+
+def function_timings(stats: pstats.Stats) -> dict[str, dict[str, float]]:
+    """Return the timings of the reported functions, by cumulative time."""
+    timings = {}
+    for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+        if filename.startswith(PACKAGE_DIR):
+            key = f"{Path(filename).relative_to(PACKAGE_DIR)}:{line}({name})"
+        elif any(function in name for function in REPORTED_FUNCTIONS):
+            key = name if filename == "~" else f"{Path(filename).name}:{line}({name})"
+        else:
+            continue
+        timings[key] = {"calls": calls, "total": total, "cumulative": cumulative}
+    return dict(sorted(timings.items(), key=lambda item: item[1]["cumulative"], reverse=True))
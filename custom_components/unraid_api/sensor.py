@@ -11,12 +11,19 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTemperature
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTemperature,
+    UnitOfTime,
+)
 from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import CONF_DOCKER, CONF_DRIVES, CONF_SHARES, CONF_VMS
 from .coordinator import UnraidDataUpdateCoordinator
+from .forecast import days_until_full
 from .models import Disk, DiskType, DockerContainer, DockerState, Share, VirtualMachine, VmState
 
 if TYPE_CHECKING:
@@ -34,8 +41,12 @@ _LOGGER = logging.getLogger(__name__)
 class UnraidSensorEntityDescription(SensorEntityDescription, frozen_or_thawed=True):
     """Description for Unraid Sensor Entity."""
 
+    # None for sensors of the integration itself, updated with every refresh
+    category: str | None
     value_fn: Callable[[UnraidDataUpdateCoordinator], StateType]
     extra_values_fn: Callable[[UnraidDataUpdateCoordinator], dict[str, Any]] | None = None
+    # Optional fields of the category to query, see models.OPTIONAL_FIELDS
+    fields: tuple[str, ...] = ()
 
 
 class UnraidDiskSensorEntityDescription(SensorEntityDescription, frozen_or_thawed=True):
@@ -43,6 +54,7 @@ class UnraidDiskSensorEntityDescription(SensorEntityDescription, frozen_or_thawe
 
     value_fn: Callable[[Disk], StateType]
     extra_values_fn: Callable[[Disk], dict[str, Any]] | None = None
+    fields: tuple[str, ...] = ()
 
 
 class UnraidShareSensorEntityDescription(SensorEntityDescription, frozen_or_thawed=True):
@@ -50,6 +62,16 @@ class UnraidShareSensorEntityDescription(SensorEntityDescription, frozen_or_thaw
 
     value_fn: Callable[[Share], StateType]
     extra_values_fn: Callable[[Share], dict[str, Any]] | None = None
+    fields: tuple[str, ...] = ()
+
+
+class UnraidForecastSensorEntityDescription(SensorEntityDescription, frozen_or_thawed=True):
+    """Description for Unraid Forecast Sensor Entity."""
+
+    category: str
+    # Used and total space of the array, a disk or a share
+    capacity_fn: Callable[[Any], tuple[int | None, int | None]]
+    fields: tuple[str, ...] = ()
 
 
 class UnraidVmSensorEntityDescription(SensorEntityDescription, frozen_or_thawed=True):
@@ -70,6 +92,8 @@ def calc_array_usage_percentage(coordinator: UnraidDataUpdateCoordinator) -> Sta
     """Calculate the array usage percentage."""
     used = coordinator.data["array"].capacity_used
     total = coordinator.data["array"].capacity_total
+    if used is None or not total:
+        return None
     return (used / total) * 100
 
 
@@ -80,9 +104,16 @@ def calc_disk_usage_percentage(disk: Disk) -> StateType:
     return (disk.fs_used / disk.fs_size) * 100
 
 
+def share_capacity(share: Share) -> tuple[int | None, int | None]:
+    """Return the used and total space of a share."""
+    if share.used is None or share.free is None:
+        return share.used, None
+    return share.used, share.used + share.free
+
+
 def count_vms_by_state(coordinator: UnraidDataUpdateCoordinator, state: VmState) -> int:
     """Count VMs in a specific state."""
-    return sum(1 for vm in coordinator.data["vms"].values() if vm.state == state)
+    return coordinator.state_counts("vms")[state]
 
 
 def count_vms_total(coordinator: UnraidDataUpdateCoordinator) -> int:
@@ -92,7 +123,7 @@ def count_vms_total(coordinator: UnraidDataUpdateCoordinator) -> int:
 
 def count_docker_by_state(coordinator: UnraidDataUpdateCoordinator, state: DockerState) -> int:
     """Count Docker containers in a specific state."""
-    return sum(1 for container in coordinator.data["docker"].values() if container.state == state)
+    return coordinator.state_counts("docker")[state]
 
 
 def count_docker_total(coordinator: UnraidDataUpdateCoordinator) -> int:
@@ -103,6 +134,7 @@ def count_docker_total(coordinator: UnraidDataUpdateCoordinator) -> int:
 SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
     UnraidSensorEntityDescription(
         key="array_state",
+        category="array",
         device_class=SensorDeviceClass.ENUM,
         value_fn=lambda coordinator: coordinator.data["array"].state.lower(),
         options=[
@@ -121,10 +153,12 @@ SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
     ),
     UnraidSensorEntityDescription(
         key="array_usage",
+        category="array",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         suggested_display_precision=2,
         value_fn=calc_array_usage_percentage,
+        fields=("capacity_used", "capacity_free", "capacity_total"),
         extra_values_fn=lambda coordinator: {
             "used": coordinator.data["array"].capacity_used,
             "free": coordinator.data["array"].capacity_free,
@@ -133,26 +167,31 @@ SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
     ),
     UnraidSensorEntityDescription(
         key="array_free",
+        category="array",
         device_class=SensorDeviceClass.DATA_SIZE,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfInformation.KILOBYTES,
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda coordinator: coordinator.data["array"].capacity_free,
+        fields=("capacity_free",),
         entity_registry_enabled_default=False,
     ),
     UnraidSensorEntityDescription(
         key="array_used",
+        category="array",
         device_class=SensorDeviceClass.DATA_SIZE,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfInformation.KILOBYTES,
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda coordinator: coordinator.data["array"].capacity_used,
+        fields=("capacity_used",),
         entity_registry_enabled_default=False,
     ),
     UnraidSensorEntityDescription(
         key="ram_usage",
+        category="metrics",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         suggested_display_precision=2,
@@ -163,33 +202,98 @@ SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
             "total": coordinator.data["metrics"].memory_total,
             "available": coordinator.data["metrics"].memory_available,
         },
+        fields=(
+            "memory_percent_total",
+            "memory_active",
+            "memory_free",
+            "memory_total",
+            "memory_available",
+        ),
     ),
     UnraidSensorEntityDescription(
         key="ram_used",
+        category="metrics",
         device_class=SensorDeviceClass.DATA_SIZE,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfInformation.BYTES,
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda coordinator: coordinator.data["metrics"].memory_active,
+        fields=("memory_active",),
         entity_registry_enabled_default=False,
     ),
     UnraidSensorEntityDescription(
         key="ram_free",
+        category="metrics",
         device_class=SensorDeviceClass.DATA_SIZE,
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfInformation.BYTES,
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda coordinator: coordinator.data["metrics"].memory_free,
+        fields=("memory_free",),
         entity_registry_enabled_default=False,
     ),
     UnraidSensorEntityDescription(
         key="cpu_utilization",
+        category="metrics",
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         suggested_display_precision=2,
         value_fn=lambda coordinator: coordinator.data["metrics"].cpu_percent_total,
+        fields=("cpu_percent_total",),
+    ),
+    UnraidSensorEntityDescription(
+        key="cpu_utilization_average",
+        category="metrics",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics_history["cpu_percent_total"].mean(),
+        fields=("cpu_percent_total",),
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="cpu_utilization_max",
+        category="metrics",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics_history["cpu_percent_total"].maximum(),
+        fields=("cpu_percent_total",),
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="cpu_utilization_p95",
+        category="metrics",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics_history["cpu_percent_total"].percentile(
+            95
+        ),
+        fields=("cpu_percent_total",),
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="cpu_utilization_change",
+        category="metrics",
+        native_unit_of_measurement="%/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics_history["cpu_percent_total"].rate(),
+        fields=("cpu_percent_total",),
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="ram_usage_average",
+        category="metrics",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics_history["memory_percent_total"].mean(),
+        fields=("memory_percent_total",),
+        entity_registry_enabled_default=False,
     ),
 )
 
@@ -217,6 +321,7 @@ DISK_SENSOR_DESCRIPTIONS: tuple[UnraidDiskSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         value_fn=lambda disk: disk.temp,
+        fields=("temp",),
     ),
 )
 
@@ -227,6 +332,7 @@ DISK_SENSOR_SPACE_DESCRIPTIONS: tuple[UnraidDiskSensorEntityDescription, ...] =
         state_class=SensorStateClass.MEASUREMENT,
         suggested_display_precision=2,
         value_fn=calc_disk_usage_percentage,
+        fields=("fs_used", "fs_size"),
     ),
     UnraidDiskSensorEntityDescription(
         key="disk_free",
@@ -236,6 +342,7 @@ DISK_SENSOR_SPACE_DESCRIPTIONS: tuple[UnraidDiskSensorEntityDescription, ...] =
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda disk: disk.fs_free,
+        fields=("fs_free",),
         entity_registry_enabled_default=False,
     ),
     UnraidDiskSensorEntityDescription(
@@ -246,6 +353,7 @@ DISK_SENSOR_SPACE_DESCRIPTIONS: tuple[UnraidDiskSensorEntityDescription, ...] =
         suggested_unit_of_measurement=UnitOfInformation.GIGABYTES,
         suggested_display_precision=2,
         value_fn=lambda disk: disk.fs_used,
+        fields=("fs_used",),
         entity_registry_enabled_default=False,
     ),
 )
@@ -266,9 +374,45 @@ SHARE_SENSOR_DESCRIPTIONS: tuple[UnraidShareSensorEntityDescription, ...] = (
             "allocator": share.allocator,
             "floor": share.floor,
         },
+        fields=("free", "used", "size", "allocator", "floor"),
     ),
 )
 
+ARRAY_FORECAST_DESCRIPTION = UnraidForecastSensorEntityDescription(
+    key="array_days_until_full",
+    category="array",
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    native_unit_of_measurement=UnitOfTime.DAYS,
+    suggested_display_precision=1,
+    capacity_fn=lambda array: (array.capacity_used, array.capacity_total),
+    fields=("capacity_used", "capacity_total"),
+)
+
+DISK_FORECAST_DESCRIPTION = UnraidForecastSensorEntityDescription(
+    key="disk_days_until_full",
+    category="disks",
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    native_unit_of_measurement=UnitOfTime.DAYS,
+    suggested_display_precision=1,
+    capacity_fn=lambda disk: (disk.fs_used, disk.fs_size),
+    fields=("fs_used", "fs_size"),
+    entity_registry_enabled_default=False,
+)
+
+SHARE_FORECAST_DESCRIPTION = UnraidForecastSensorEntityDescription(
+    key="share_days_until_full",
+    category="shares",
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    native_unit_of_measurement=UnitOfTime.DAYS,
+    suggested_display_precision=1,
+    capacity_fn=share_capacity,
+    fields=("used", "free"),
+    entity_registry_enabled_default=False,
+)
+
 VM_SENSOR_DESCRIPTIONS: tuple[UnraidVmSensorEntityDescription, ...] = (
     UnraidVmSensorEntityDescription(
         key="vm_state",
@@ -312,24 +456,28 @@ DOCKER_SENSOR_DESCRIPTIONS: tuple[UnraidDockerSensorEntityDescription, ...] = (
 VM_AGGREGATE_SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
     UnraidSensorEntityDescription(
         key="vms_total",
+        category="vms",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=count_vms_total,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="vms_running",
+        category="vms",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_vms_by_state(coordinator, VmState.RUNNING),
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="vms_stopped",
+        category="vms",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_vms_by_state(coordinator, VmState.STOPPED),
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="vms_paused",
+        category="vms",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_vms_by_state(coordinator, VmState.PAUSED),
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -339,30 +487,86 @@ VM_AGGREGATE_SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
 DOCKER_AGGREGATE_SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
     UnraidSensorEntityDescription(
         key="docker_total",
+        category="docker",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=count_docker_total,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="docker_running",
+        category="docker",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_docker_by_state(coordinator, DockerState.RUNNING),
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="docker_stopped",
+        category="docker",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_docker_by_state(coordinator, DockerState.STOPPED),
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
     UnraidSensorEntityDescription(
         key="docker_paused",
+        category="docker",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda coordinator: count_docker_by_state(coordinator, DockerState.PAUSED),
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
 )
 
+INSTRUMENTATION_SENSOR_DESCRIPTIONS: tuple[UnraidSensorEntityDescription, ...] = (
+    UnraidSensorEntityDescription(
+        key="update_duration",
+        category=None,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda coordinator: coordinator.update_time.last,
+        extra_values_fn=lambda coordinator: {
+            "mean": coordinator.update_time.mean,
+            "maximum": coordinator.update_time.maximum,
+            "listener_mean": coordinator.listener_time.mean,
+        },
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="request_duration",
+        category=None,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda coordinator: coordinator.api_stats.mean_wall_time,
+        extra_values_fn=lambda coordinator: {
+            name: stats.wall_time.mean for name, stats in coordinator.api_stats.operations.items()
+        },
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="request_errors",
+        category=None,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api_stats.errors,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    UnraidSensorEntityDescription(
+        key="received_data",
+        category=None,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.KILOBYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.api_stats.response_bytes,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,  # noqa: ARG001
@@ -370,7 +574,14 @@ async def async_setup_entry(
     async_add_entites: AddEntitiesCallback,
 ) -> None:
     """Set up this integration using config entry."""
-    entities = [UnraidSensor(description, config_entry) for description in SENSOR_DESCRIPTIONS]
+    entities: list[SensorEntity] = [
+        UnraidSensor(description, config_entry) for description in SENSOR_DESCRIPTIONS
+    ]
+    entities.append(UnraidForecastSensor(ARRAY_FORECAST_DESCRIPTION, config_entry))
+    entities.extend(
+        UnraidSensor(description, config_entry)
+        for description in INSTRUMENTATION_SENSOR_DESCRIPTIONS
+    )
 
     # Add VM aggregate sensors if VM monitoring is enabled
     if config_entry.options.get(CONF_VMS, False):
@@ -389,42 +600,61 @@ async def async_setup_entry(
     async_add_entites(entities)
 
     @callback
-    def add_disk_callback(disk: Disk) -> None:
-        _LOGGER.debug("Adding new Disk: %s", disk.name)
-        entities = [
-            UnraidDiskSensor(description, config_entry, disk.id)
-            for description in DISK_SENSOR_DESCRIPTIONS
-        ]
-        if disk.type != DiskType.Parity:
+    def add_disk_callback(disks: list[Disk]) -> None:
+        _LOGGER.debug("Adding new Disks: %s", ", ".join(disk.name for disk in disks))
+        entities: list[SensorEntity] = []
+        for disk in disks:
             entities.extend(
                 UnraidDiskSensor(description, config_entry, disk.id)
-                for description in DISK_SENSOR_SPACE_DESCRIPTIONS
+                for description in DISK_SENSOR_DESCRIPTIONS
             )
+            if disk.type != DiskType.Parity:
+                entities.extend(
+                    UnraidDiskSensor(description, config_entry, disk.id)
+                    for description in DISK_SENSOR_SPACE_DESCRIPTIONS
+                )
+                entities.append(
+                    UnraidForecastSensor(
+                        DISK_FORECAST_DESCRIPTION, config_entry, disk.id, {"disk_name": disk.name}
+                    )
+                )
         async_add_entites(entities)
 
     @callback
-    def add_share_callback(share: Share) -> None:
-        _LOGGER.debug("Adding new Share: %s", share.name)
-        entities = [
+    def add_share_callback(shares: list[Share]) -> None:
+        _LOGGER.debug("Adding new Shares: %s", ", ".join(share.name for share in shares))
+        entities: list[SensorEntity] = [
             UnraidShareSensor(description, config_entry, share.name)
+            for share in shares
             for description in SHARE_SENSOR_DESCRIPTIONS
         ]
+        entities.extend(
+            UnraidForecastSensor(
+                SHARE_FORECAST_DESCRIPTION, config_entry, share.name, {"share_name": share.name}
+            )
+            for share in shares
+        )
         async_add_entites(entities)
 
     @callback
-    def add_vm_callback(vm: VirtualMachine) -> None:
-        _LOGGER.debug("Adding new VM: %s", vm.name)
+    def add_vm_callback(vms: list[VirtualMachine]) -> None:
+        _LOGGER.debug("Adding new VMs: %s", ", ".join(vm.name for vm in vms))
         entities = [
             UnraidVmSensor(description, config_entry, vm.id)
+            for vm in vms
             for description in VM_SENSOR_DESCRIPTIONS
         ]
         async_add_entites(entities)
 
     @callback
-    def add_docker_callback(container: DockerContainer) -> None:
-        _LOGGER.debug("Adding new Docker container: %s", container.name)
+    def add_docker_callback(containers: list[DockerContainer]) -> None:
+        _LOGGER.debug(
+            "Adding new Docker containers: %s",
+            ", ".join(container.name for container in containers),
+        )
         entities = [
             UnraidDockerSensor(description, config_entry, container.id)
+            for container in containers
             for description in DOCKER_SENSOR_DESCRIPTIONS
         ]
         async_add_entites(entities)
@@ -450,13 +680,33 @@ class UnraidSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEntity)
         description: UnraidSensorEntityDescription,
         config_entry: UnraidConfigEntry,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        # Sensors without a category are updated with every refresh
+        context = None if description.category is None else (description.category, None)
+        super().__init__(config_entry.runtime_data.coordinator, context)
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}"
         self._attr_translation_key = description.key
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self.entity_description.category is None:
+            return
+        self.async_on_remove(
+            self.coordinator.async_require_fields(
+                self.entity_description.category, self.entity_description.fields
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        if self.entity_description.category is None:
+            return super().available
+        return super().available and self.coordinator.category_available(
+            self.entity_description.category
+        )
+
     @property
     def native_value(self) -> StateType:
         try:
@@ -486,7 +736,7 @@ class UnraidDiskSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEnt
         config_entry: UnraidConfigEntry,
         disk_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("disks", disk_id))
         self.disk_id = disk_id
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}-{self.disk_id}"
@@ -497,6 +747,16 @@ class UnraidDiskSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEnt
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_require_fields("disks", self.entity_description.fields)
+        )
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("disks")
+
     @property
     def native_value(self) -> StateType:
         try:
@@ -528,7 +788,7 @@ class UnraidShareSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEn
         config_entry: UnraidConfigEntry,
         share_name: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("shares", share_name))
         self.share_name = share_name
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}-{self.share_name}"
@@ -537,6 +797,16 @@ class UnraidShareSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEn
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_require_fields("shares", self.entity_description.fields)
+        )
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("shares")
+
     @property
     def native_value(self) -> StateType:
         try:
@@ -558,6 +828,59 @@ class UnraidShareSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEn
         return None
 
 
+class UnraidForecastSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEntity):
+    """Sensor for the days until the Unraid array, a disk or a share is full."""
+
+    entity_description: UnraidForecastSensorEntityDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        description: UnraidForecastSensorEntityDescription,
+        config_entry: UnraidConfigEntry,
+        item_id: str | None = None,
+        translation_placeholders: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(config_entry.runtime_data.coordinator, (description.category, item_id))
+        self.item_id = item_id
+        self.entity_description = description
+        self._attr_unique_id = f"{config_entry.entry_id}-{description.key}"
+        if item_id is not None:
+            self._attr_unique_id += f"-{item_id}"
+        self._attr_translation_key = description.key
+        self._attr_translation_placeholders = translation_placeholders or {}
+        self._attr_available = False
+        self._attr_device_info = config_entry.runtime_data.device_info
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_require_fields(
+                self.entity_description.category, self.entity_description.fields
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available(
+            self.entity_description.category
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        category = self.entity_description.category
+        # The array is the only item of its category
+        key = self.item_id or category
+        try:
+            item = self.coordinator.data[category]
+            if self.item_id is not None:
+                item = item[self.item_id]
+        except KeyError:
+            return None
+        used, total = self.entity_description.capacity_fn(item)
+        return days_until_full(self.coordinator.forecasts[category].get(key), used, total)
+
+
 class UnraidVmSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEntity):
     """Sensor for Unraid VMs."""
 
@@ -570,7 +893,7 @@ class UnraidVmSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEntit
         config_entry: UnraidConfigEntry,
         vm_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("vms", vm_id))
         self.vm_id = vm_id
         self.entity_description = description
         self._attr_unique_id = f"{config_entry.entry_id}-{description.key}-{self.vm_id}"
@@ -581,6 +904,10 @@ class UnraidVmSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorEntit
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("vms")
+
     @property
     def native_value(self) -> StateType:
         try:
@@ -612,7 +939,7 @@ class UnraidDockerSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorE
         config_entry: UnraidConfigEntry,
         container_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("docker", container_id))
         self.container_id = container_id
         self.entity_description = description
         self._attr_unique_id = (
@@ -625,6 +952,10 @@ class UnraidDockerSensor(CoordinatorEntity[UnraidDataUpdateCoordinator], SensorE
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("docker")
+
     @property
     def native_value(self) -> StateType:
         try:
@@ -0,0 +1,198 @@
+"""Services of the Unraid integration."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from aiohttp import ClientError
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from pydantic_core import ValidationError
+
+from .api import UnraidAuthError, UnraidGraphQLError
+from .const import DOCKER_ACTIONS, DOMAIN, VM_ACTIONS
+from .profiling import async_profile_refresh
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from homeassistant.core import HomeAssistant
+
+    from . import UnraidConfigEntry
+    from .models import DockerContainer, VirtualMachine
+
+_LOGGER = logging.getLogger(__name__)
+
+# Errors of the requests of the actions, reported to the caller
+ACTION_ERRORS = (ClientError, TimeoutError, UnraidGraphQLError, ValidationError)
+
+SERVICE_VM_ACTION = "vm_action"
+SERVICE_DOCKER_ACTION = "docker_action"
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ACTION = "action"
+ATTR_VMS = "vms"
+ATTR_CONTAINERS = "containers"
+ATTR_CYCLES = "cycles"
+ATTR_MEMORY = "memory"
+
+VM_ACTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_ACTION): vol.In(VM_ACTIONS),
+        vol.Required(ATTR_VMS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+DOCKER_ACTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_ACTION): vol.In(DOCKER_ACTIONS),
+        vol.Required(ATTR_CONTAINERS): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+PROFILE_REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+        vol.Optional(ATTR_MEMORY, default=False): cv.boolean,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def vm_action(call: ServiceCall) -> ServiceResponse:
+        """Run an action on a group of VMs with one request."""
+        entry = _get_entry(hass, call)
+        coordinator = entry.runtime_data.coordinator
+        vm_ids = _resolve_items(coordinator.data.get("vms", {}), call.data[ATTR_VMS])
+        try:
+            results = await coordinator.async_vm_action_many(vm_ids, call.data[ATTR_ACTION])
+        except ACTION_ERRORS as exc:
+            raise _action_failed(hass, entry, exc) from exc
+        return {"vms": results}
+
+    async def docker_action(call: ServiceCall) -> ServiceResponse:
+        """Run an action on a group of Docker containers with one request."""
+        entry = _get_entry(hass, call)
+        coordinator = entry.runtime_data.coordinator
+        container_ids = _resolve_items(
+            coordinator.data.get("docker", {}), call.data[ATTR_CONTAINERS]
+        )
+        try:
+            results = await coordinator.async_docker_action_many(
+                container_ids, call.data[ATTR_ACTION]
+            )
+        except ACTION_ERRORS as exc:
+            raise _action_failed(hass, entry, exc) from exc
+        return {"containers": results}
+
+    async def profile_refresh(call: ServiceCall) -> ServiceResponse:
+        """Profile full refresh cycles, writing the statistics to the config directory."""
+        coordinator = _get_entry(hass, call).runtime_data.coordinator
+        try:
+            return await async_profile_refresh(
+                hass, coordinator, call.data[ATTR_CYCLES], memory=call.data[ATTR_MEMORY]
+            )
+        except ValueError as exc:
+            # Only one profiler can be active at a time
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="profiler_active",
+            ) from exc
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_VM_ACTION,
+        vm_action,
+        schema=VM_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DOCKER_ACTION,
+        docker_action,
+        schema=DOCKER_ACTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_REFRESH,
+        profile_refresh,
+        schema=PROFILE_REFRESH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _get_entry(hass: HomeAssistant, call: ServiceCall) -> UnraidConfigEntry:
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry: UnraidConfigEntry | None = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="entry_not_loaded",
+            translation_placeholders={"entry_id": entry_id},
+        )
+    return entry
+
+
+def _resolve_items(
+    items: Mapping[str, VirtualMachine | DockerContainer], names: list[str]
+) -> list[str]:
+    """Resolve items given by id or name to their ids."""
+    ids_by_name = {item.name: item_id for item_id, item in items.items()}
+    item_ids = []
+    unknown = []
+    for name in names:
+        if name in items:
+            item_ids.append(name)
+        elif name in ids_by_name:
+            item_ids.append(ids_by_name[name])
+        else:
+            unknown.append(name)
+    if unknown:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="unknown_items",
+            translation_placeholders={"items": ", ".join(unknown)},
+        )
+    return item_ids
+
+
+def _action_failed(
+    hass: HomeAssistant, entry: UnraidConfigEntry, exc: Exception
+) -> HomeAssistantError:
+    if isinstance(exc, UnraidAuthError):
+        _LOGGER.debug("Service: Auth failed")
+        # Like a failed update, ask the user for a new API key
+        entry.async_start_reauth(hass)
+        return HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="auth_failed",
+            translation_placeholders={"error_msg": exc.args[0]},
+        )
+    if isinstance(exc, UnraidGraphQLError):
+        _LOGGER.debug("Service: GraphQL Error response: %s", exc.response)
+        return HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="error_response",
+            translation_placeholders={"error_msg": exc.args[0]},
+        )
+    if isinstance(exc, ValidationError):
+        _LOGGER.debug("Service: invalid data")
+        return HomeAssistantError(translation_domain=DOMAIN, translation_key="data_invalid")
+    _LOGGER.debug("Service: Connection error: %s", str(exc))
+    return HomeAssistantError(
+        translation_domain=DOMAIN,
+        translation_key="cannot_connect",
+        translation_placeholders={"error": str(exc)},
+    )
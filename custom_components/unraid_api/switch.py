@@ -31,14 +31,18 @@ async def async_setup_entry(
     """Set up this integration using config entry."""
 
     @callback
-    def add_vm_callback(vm: VirtualMachine) -> None:
-        _LOGGER.debug("Adding VM switch: %s", vm.name)
-        async_add_entities([UnraidVmSwitch(config_entry, vm.id)])
+    def add_vm_callback(vms: list[VirtualMachine]) -> None:
+        _LOGGER.debug("Adding VM switches: %s", ", ".join(vm.name for vm in vms))
+        async_add_entities([UnraidVmSwitch(config_entry, vm.id) for vm in vms])
 
     @callback
-    def add_docker_callback(container: DockerContainer) -> None:
-        _LOGGER.debug("Adding Docker switch: %s", container.name)
-        async_add_entities([UnraidDockerSwitch(config_entry, container.id)])
+    def add_docker_callback(containers: list[DockerContainer]) -> None:
+        _LOGGER.debug(
+            "Adding Docker switches: %s", ", ".join(container.name for container in containers)
+        )
+        async_add_entities(
+            [UnraidDockerSwitch(config_entry, container.id) for container in containers]
+        )
 
     if config_entry.options.get(CONF_VMS, False):
         config_entry.runtime_data.coordinator.subscribe_vms(add_vm_callback)
@@ -56,7 +60,7 @@ class UnraidVmSwitch(CoordinatorEntity[UnraidDataUpdateCoordinator], SwitchEntit
         config_entry: UnraidConfigEntry,
         vm_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("vms", vm_id))
         self.vm_id = vm_id
         self._attr_unique_id = f"{config_entry.entry_id}-vm-{self.vm_id}"
         self._attr_translation_key = "vm"
@@ -66,6 +70,10 @@ class UnraidVmSwitch(CoordinatorEntity[UnraidDataUpdateCoordinator], SwitchEntit
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("vms")
+
     @property
     def is_on(self) -> bool | None:
         """Return true if VM is running."""
@@ -105,7 +113,7 @@ class UnraidDockerSwitch(CoordinatorEntity[UnraidDataUpdateCoordinator], SwitchE
         config_entry: UnraidConfigEntry,
         container_id: str,
     ) -> None:
-        super().__init__(config_entry.runtime_data.coordinator)
+        super().__init__(config_entry.runtime_data.coordinator, ("docker", container_id))
         self.container_id = container_id
         self._attr_unique_id = f"{config_entry.entry_id}-docker-{self.container_id}"
         self._attr_translation_key = "docker"
@@ -115,6 +123,10 @@ class UnraidDockerSwitch(CoordinatorEntity[UnraidDataUpdateCoordinator], SwitchE
         self._attr_available = False
         self._attr_device_info = config_entry.runtime_data.device_info
 
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.category_available("docker")
+
     @property
     def is_on(self) -> bool | None:
         """Return true if container is running."""
@@ -0,0 +1,87 @@
+"""
+Benchmark response decoding of the GraphQL client.
+
+Compares decoding a response body with json.loads followed by model_validate,
+to validating the raw bytes with model_validate_json on the response envelope.
+
+Usage: python script/benchmark_decode.py [containers] [disks]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from custom_components.unraid_api.api import GraphQLResponse
+from custom_components.unraid_api.api.v4_20 import DiskQuery, DockerQuery
+
+ROUNDS = 200
+
+
+def docker_body(count: int) -> bytes:
+    """Create a docker query response with count containers."""
+    containers = [
+        {
+            "id": f"container:{index:064x}",
+            "names": [f"/container_{index}"],
+            "state": "RUNNING" if index % 3 else "EXITED",
+            "image": f"registry.example.com/image_{index % 20}:latest",
+            "autoStart": index % 2 == 0,
+        }
+        for index in range(count)
+    ]
+    return json.dumps({"data": {"docker": {"containers": containers}}}).encode()
+
+
+def disks_body(count: int) -> bytes:
+    """Create a disks query response with count data disks."""
+
+    def disk(index: int, disk_type: str) -> dict:
+        return {
+            "name": f"{disk_type.lower()}{index}",
+            "status": "DISK_OK",
+            "temp": 30 + index % 10,
+            "fsSize": 5999038075,
+            "fsFree": 464583438,
+            "fsUsed": 5534454637,
+            "type": disk_type,
+            "id": f"{disk_type}:{index:016x}",
+            "isSpinning": index % 2 == 0,
+        }
+
+    array = {
+        "disks": [disk(index, "DATA") for index in range(count)],
+        "caches": [disk(index, "CACHE") for index in range(2)],
+        "parities": [disk(index, "PARITY") for index in range(2)],
+    }
+    return json.dumps({"data": {"array": array}}).encode()
+
+
+def benchmark(name: str, body: bytes, model: type) -> None:
+    """Print the time per decode for both paths."""
+
+    def dict_path() -> None:
+        model.model_validate(json.loads(body)["data"])
+
+    def bytes_path() -> None:
+        GraphQLResponse[model].model_validate_json(body)
+
+    dict_time = min(timeit.repeat(dict_path, number=ROUNDS, repeat=5)) / ROUNDS
+    bytes_time = min(timeit.repeat(bytes_path, number=ROUNDS, repeat=5)) / ROUNDS
+    print(  # noqa: T201
+        f"{name:<8} {len(body) / 1024:8.1f} KiB  "
+        f"json+model_validate {dict_time * 1e3:7.3f} ms  "
+        f"model_validate_json {bytes_time * 1e3:7.3f} ms  "
+        f"({dict_time / bytes_time:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    containers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    disks = int(sys.argv[2]) if len(sys.argv) > 2 else 30  # noqa: PLR2004
+    benchmark("docker", docker_body(containers), DockerQuery)
+    benchmark("disks", disks_body(disks), DiskQuery)
@@ -2,20 +2,28 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from custom_components import unraid_api
-from custom_components.unraid_api import config_flow
+from custom_components.unraid_api import config_flow, coordinator
+from custom_components.unraid_api.models import DockerState
 
 from .const import CLIENT_RESPONSES
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Collection, Generator, Mapping
 
     from awesomeversion import AwesomeVersion
-    from custom_components.unraid_api.models import Array, Disk, Metrics, ServerInfo, Share
+    from custom_components.unraid_api.models import (
+        Array,
+        Disk,
+        DockerContainer,
+        Metrics,
+        ServerInfo,
+        Share,
+        VirtualMachine,
+    )
 
 pytest_plugins = ["aiohttp.pytest_plugin"]
 
@@ -25,6 +33,7 @@ class MockAPIClient:
 
     def __init__(self, responses: dict) -> None:
         self.responses = responses
+        self.version = responses["api_version"]
 
     async def query_api_version(self) -> AwesomeVersion:
         return self.responses["api_version"]
@@ -32,18 +41,48 @@ class MockAPIClient:
     async def query_server_info(self) -> ServerInfo:
         return self.responses["server_info"]
 
-    async def query_metrics(self) -> Metrics:
+    async def query_metrics(self, *, fields: frozenset[str] | None = None) -> Metrics:
         return self.responses["metrics"]
 
-    async def query_shares(self) -> list[Share]:
+    async def query_shares(self, *, fields: frozenset[str] | None = None) -> list[Share]:
         return self.responses["shares"]
 
-    async def query_disks(self) -> list[Disk]:
+    async def query_disks(self, *, fields: frozenset[str] | None = None) -> list[Disk]:
         return self.responses["disks"]
 
-    async def query_array(self) -> Array:
+    async def query_array(self, *, fields: frozenset[str] | None = None) -> Array:
         return self.responses["array"]
 
+    async def query_vms(self) -> list[VirtualMachine]:
+        return self.responses["vms"]
+
+    async def query_docker_containers(self) -> list[DockerContainer]:
+        return self.responses["docker"]
+
+    async def docker_start(self, container_id: str) -> DockerState | None:
+        return DockerState.RUNNING
+
+    async def docker_stop(self, container_id: str) -> DockerState | None:
+        return DockerState.EXITED
+
+    async def docker_start_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        return dict.fromkeys(container_ids, DockerState.RUNNING)
+
+    async def docker_stop_many(
+        self, container_ids: Collection[str]
+    ) -> dict[str, DockerState | None]:
+        return dict.fromkeys(container_ids, DockerState.EXITED)
+
+    async def query_combined(
+        self,
+        categories: Collection[str],
+        *,
+        fields: Mapping[str, frozenset[str]] | None = None,
+    ) -> dict[str, Any]:
+        return {category: self.responses[category] for category in categories}
+
 
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:  # noqa: ARG001
@@ -67,6 +106,6 @@ def mock_get_api_client(
 ) -> Generator[AsyncMock]:
     """Override get_api_client."""
     mock_get_api_client = AsyncMock(return_value=MockAPIClient(request.param))
-    monkeypatch.setattr(unraid_api, "get_api_client", mock_get_api_client)
     monkeypatch.setattr(config_flow, "get_api_client", mock_get_api_client)
+    monkeypatch.setattr(coordinator, "get_api_client", mock_get_api_client)
     return mock_get_api_client
@@ -10,9 +10,13 @@ from custom_components.unraid_api.models import (
     Disk,
     DiskStatus,
     DiskType,
+    DockerContainer,
+    DockerState,
     Metrics,
     ServerInfo,
     Share,
+    VirtualMachine,
+    VmState,
 )
 from homeassistant.const import CONF_API_KEY, CONF_HOST, CONF_VERIFY_SSL
 
@@ -122,5 +126,25 @@ CLIENT_RESPONSES = [
             capacity_used=11474981430,
             capacity_total=11998076150,
         ),
+        "vms": [
+            VirtualMachine(id="vm:1", name="Windows", state=VmState.RUNNING),
+            VirtualMachine(id="vm:2", name="Ubuntu", state=VmState.SHUTDOWN),
+        ],
+        "docker": [
+            DockerContainer(
+                id="container:abc",
+                name="plex",
+                state=DockerState.RUNNING,
+                image="plexinc/pms-docker:latest",
+                autostart=True,
+            ),
+            DockerContainer(
+                id="container:def",
+                name="container:def",
+                state=DockerState.EXITED,
+                image="alpine:latest",
+                autostart=False,
+            ),
+        ],
     }
 ]
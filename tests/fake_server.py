@@ -0,0 +1,258 @@
+"""Local stand-in for the Unraid GraphQL API, for end-to-end tests."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from aiohttp import web
+
+# Alias, field, variable of the argument and the opening brace of a selection
+TOKEN = re.compile(r"(?:(\w+)\s*:\s*)?(\w+)(?:\(\s*\w+\s*:\s*\$(\w+)\s*\))?|[{}]")
+OPERATION = re.compile(r"^\s*(query|mutation)\s+(\w+)")
+
+# State after each action of the mutations
+DOCKER_ACTION_STATES = {"start": "RUNNING", "stop": "EXITED"}
+VM_ACTION_STATES = {
+    "start": "RUNNING",
+    "stop": "SHUTDOWN",
+    "reboot": "RUNNING",
+    "pause": "PAUSED",
+    "resume": "RUNNING",
+    "forceStop": "SHUTDOWN",
+}
+
+INTERNAL_ERROR = {
+    "errors": [
+        {"message": "Internal server error", "extensions": {"code": "INTERNAL_SERVER_ERROR"}}
+    ]
+}
+UNAUTHENTICATED = {
+    "errors": [{"message": "Unauthorized", "extensions": {"code": "UNAUTHENTICATED"}}]
+}
+
+
+class Field(NamedTuple):
+    """Selected field of a GraphQL document."""
+
+    name: str
+    variable: str | None
+    selection: dict[str, Field] | None
+
+
+def parse_selection(document: str) -> dict[str, Field]:
+    """Return the selection set of an operation, by alias."""
+    root: dict[str, Field] = {}
+    parents: list[dict[str, Field]] = []
+    current = root
+    alias = ""
+    for match in TOKEN.finditer(document, document.index("{") + 1):
+        part = match.group(0)
+        if part == "{":
+            parents.append(current)
+            name, variable, _ = current[alias]
+            current[alias] = Field(name, variable, {})
+            current = current[alias].selection
+        elif part == "}":
+            if not parents:
+                break
+            current = parents.pop()
+        else:
+            name = match.group(2)
+            alias = match.group(1) or name
+            current[alias] = Field(name, match.group(3), None)
+    return root
+
+
+def select(value: Any, selection: dict[str, Field] | None) -> Any:
+    """Return the selected fields of a value, like a GraphQL server resolves them."""
+    if selection is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [select(item, selection) for item in value]
+    return {
+        alias: select(value.get(field.name), field.selection) for alias, field in selection.items()
+    }
+
+
+def disk(index: int, disk_type: str) -> dict[str, Any]:
+    """Return a synthetic disk."""
+    size = 4_000_000_000 + index * 1_000_000
+    used = size * (index % 10 + 1) // 11
+    return {
+        "name": f"{disk_type.lower()}{index}",
+        "status": "DISK_OK",
+        "temp": 30 + index % 15,
+        "fsSize": size if disk_type != "PARITY" else None,
+        "fsFree": size - used if disk_type != "PARITY" else None,
+        "fsUsed": used if disk_type != "PARITY" else None,
+        "type": disk_type,
+        "id": f"{disk_type.lower()}:{index}",
+        "isSpinning": index % 3 != 0,
+    }
+
+
+def shares(count: int) -> list[dict[str, Any]]:
+    """Return synthetic shares."""
+    return [
+        {
+            "name": f"Share_{index}",
+            "free": 500_000_000 + index,
+            "used": 1_000_000_000 + index * 1000,
+            "size": 0,
+            "allocator": "highwater",
+            "floor": "0",
+        }
+        for index in range(count)
+    ]
+
+
+def vms(count: int) -> list[dict[str, Any]]:
+    """Return synthetic VMs, every second one running."""
+    return [
+        {
+            "id": f"vm:{index}",
+            "name": f"VM {index}",
+            "state": "RUNNING" if index % 2 else "SHUTDOWN",
+        }
+        for index in range(count)
+    ]
+
+
+def containers(count: int) -> list[dict[str, Any]]:
+    """Return synthetic Docker containers, every second one running."""
+    return [
+        {
+            "id": f"container:{index}",
+            "names": [f"/container_{index}"],
+            "state": "RUNNING" if index % 2 else "EXITED",
+            "image": f"image_{index}:latest",
+            "autoStart": index % 2 == 1,
+        }
+        for index in range(count)
+    ]
+
+
+@dataclass
+class FakeUnraidServer:
+    """
+    GraphQL endpoint serving synthetic data of a server of the given size.
+
+    Responses are delayed by latency plus a uniform jitter, and fail with an internal
+    server error at the given rate. The random numbers are seeded, so runs repeat.
+    """
+
+    disks: int = 2
+    shares: int = 2
+    vms: int = 2
+    containers: int = 2
+    latency: float = 0
+    jitter: float = 0
+    error_rate: float = 0
+    api_key: str = "test_key"
+    api_version: str = "4.20.0+196bd52"
+    seed: int = 0
+    # Requests by operation name and the most requests handled at the same time
+    requests: Counter[str] = field(default_factory=Counter)
+    max_concurrent: int = 0
+    _concurrent: int = 0
+    _states: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)  # noqa: S311
+
+    def app(self) -> web.Application:
+        """Return the application serving the endpoint."""
+        app = web.Application()
+        app.router.add_post("/graphql", self.handle)
+        return app
+
+    def data(self) -> dict[str, Any]:
+        """Return the root fields of all queries."""
+        data_disks = [disk(index, "DATA") for index in range(1, self.disks + 1)]
+        used = sum(item["fsUsed"] for item in data_disks) // 1024
+        total = sum(item["fsSize"] for item in data_disks) // 1024
+        return {
+            "info": {
+                "versions": {"core": {"api": self.api_version, "unraid": "7.0.1"}},
+            },
+            "server": {"localurl": "http://1.2.3.4", "name": "Test Server"},
+            "metrics": {
+                "memory": {
+                    "free": 415510528,
+                    "total": 16646950912,
+                    "active": 12746354688,
+                    "percentTotal": 76.56870471583932,
+                    "available": 3900596224,
+                },
+                "cpu": {"percentTotal": round(self._random.uniform(0, 100), 1)},
+            },
+            "array": {
+                "state": "STARTED",
+                "capacity": {
+                    "kilobytes": {"free": str(total - used), "used": str(used), "total": str(total)}
+                },
+                "disks": data_disks,
+                "parities": [disk(0, "PARITY")],
+                "caches": [disk(0, "CACHE")],
+            },
+            "shares": shares(self.shares),
+            "vms": {"domain": self._with_states(vms(self.vms))},
+            "docker": {"containers": self._with_states(containers(self.containers))},
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Answer a GraphQL request."""
+        self._concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        try:
+            payload = await request.json()
+            document = payload["query"]
+            operation, name = OPERATION.match(document).groups()
+            self.requests[name] += 1
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            await asyncio.sleep(max(delay, 0))
+            if request.headers.get("x-api-key") != self.api_key:
+                return web.json_response(UNAUTHENTICATED)
+            if self._random.random() < self.error_rate:
+                return web.json_response(INTERNAL_ERROR, status=500)
+            selection = parse_selection(document)
+            if operation == "mutation":
+                return web.json_response(self._mutate(selection, payload.get("variables", {})))
+            return web.json_response({"data": select(self.data(), selection)})
+        finally:
+            self._concurrent -= 1
+
+    def _with_states(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        for item in items:
+            item["state"] = self._states.get(item["id"], item["state"])
+        return items
+
+    def _mutate(self, selection: dict[str, Field], variables: dict[str, str]) -> dict[str, Any]:
+        """Run the actions of a mutation on VMs or Docker containers."""
+        (root,) = selection.values()
+        if root.name == "vm":
+            known, states = {item["id"] for item in vms(self.vms)}, VM_ACTION_STATES
+        else:
+            known, states = (
+                {item["id"] for item in containers(self.containers)},
+                DOCKER_ACTION_STATES,
+            )
+        results: dict[str, Any] = {}
+        errors = []
+        for alias, action in (root.selection or {}).items():
+            item_id = variables[action.variable]
+            if item_id not in known:
+                results[alias] = None
+                errors.append({"message": f"{item_id} not found", "path": [root.name, alias]})
+                continue
+            self._states[item_id] = states[action.name]
+            results[alias] = select({"id": item_id, "state": states[action.name]}, action.selection)
+        response: dict[str, Any] = {"data": {root.name: results}}
+        if errors:
+            response["errors"] = errors
+        return response
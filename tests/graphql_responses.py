@@ -126,6 +126,76 @@ ARRAY_RESPONSE_V4_20 = {
     }
 }
 
+VMS_RESPONSE_V4_20 = {
+    "data": {
+        "vms": {
+            "domain": [
+                {"id": "vm:1", "name": "Windows", "state": "RUNNING"},
+                {"id": "vm:2", "name": "Ubuntu", "state": "SHUTDOWN"},
+            ]
+        }
+    }
+}
+
+DOCKER_RESPONSE_V4_20 = {
+    "data": {
+        "docker": {
+            "containers": [
+                {
+                    "id": "container:abc",
+                    "names": ["/plex"],
+                    "state": "RUNNING",
+                    "image": "plexinc/pms-docker:latest",
+                    "autoStart": True,
+                },
+                {
+                    "id": "container:def",
+                    "names": [],
+                    "state": "EXITED",
+                    "image": "alpine:latest",
+                    "autoStart": False,
+                },
+            ]
+        }
+    }
+}
+
+DOCKER_STOP_RESPONSE_V4_20 = {
+    "data": {"docker": {"stop": {"id": "container:abc", "state": "EXITED"}}}
+}
+
+# The second container was already stopped
+DOCKER_STOP_MANY_RESPONSE_V4_20 = {
+    "data": {
+        "docker": {
+            "item0": {"id": "container:abc", "state": "EXITED"},
+            "item1": None,
+        }
+    },
+    "errors": [
+        {
+            "message": "Container already stopped",
+            "path": ["docker", "item1"],
+            "extensions": {"code": "INTERNAL_SERVER_ERROR"},
+        }
+    ],
+}
+
+CPU_SUBSCRIPTION_RESPONSE_V4_20 = {"data": {"systemMetricsCpu": {"percentTotal": 5.1}}}
+
+MEMORY_SUBSCRIPTION_RESPONSE_V4_20 = {
+    "data": {"systemMetricsMemory": METRICS_RESPONSE_V4_20["data"]["metrics"]["memory"]}
+}
+
+COMBINED_RESPONSE_V4_20 = {
+    "data": {
+        "metrics": METRICS_RESPONSE_V4_20["data"]["metrics"],
+        "array": ARRAY_RESPONSE_V4_20["data"]["array"],
+        "disks": DISKS_RESPONSE_V4_20["data"]["array"],
+        "shares": SHARES_RESPONSE_V4_20["data"]["shares"],
+    }
+}
+
 
 API_RESPONSES = [
     {
@@ -135,6 +205,13 @@ API_RESPONSES = [
         "shares": SHARES_RESPONSE_V4_20,
         "disks": DISKS_RESPONSE_V4_20,
         "array": ARRAY_RESPONSE_V4_20,
+        "vms": VMS_RESPONSE_V4_20,
+        "docker": DOCKER_RESPONSE_V4_20,
+        "docker_stop": DOCKER_STOP_RESPONSE_V4_20,
+        "docker_stop_many": DOCKER_STOP_MANY_RESPONSE_V4_20,
+        "combined": COMBINED_RESPONSE_V4_20,
+        "cpu_subscription": CPU_SUBSCRIPTION_RESPONSE_V4_20,
+        "memory_subscription": MEMORY_SUBSCRIPTION_RESPONSE_V4_20,
         "version": AwesomeVersion("4.20.0"),
     }
 ]
@@ -1,15 +1,30 @@
 """API Client Tests."""
 
+import asyncio
 from asyncio import AbstractEventLoop
+from collections.abc import Awaitable, Callable
 
 import pytest
+from aiohttp import ClientConnectionError, ClientSession, web
+from aiohttp.test_utils import TestServer
 from custom_components.unraid_api.api import (
+    PRIORITY_MUTATION,
+    PRIORITY_QUERY,
     IncompatibleApiError,
+    RequestScheduler,
     UnraidApiClient,
+    UnraidAuthError,
+    UnraidGraphQLError,
     get_api_client,
 )
 from custom_components.unraid_api.api.v4_20 import UnraidApiV420
-from custom_components.unraid_api.models import ArrayState, DiskStatus, DiskType
+from custom_components.unraid_api.models import (
+    ArrayState,
+    DiskStatus,
+    DiskType,
+    DockerState,
+    VmState,
+)
 from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
 
 from .const import (
@@ -122,6 +137,20 @@ async def test_metrics(api_responses: dict, loop: AbstractEventLoop) -> None:
     assert metrics.memory_available == 3900596224
     assert metrics.cpu_percent_total == 5.1
 
+    # Requests are recorded by operation name
+    stats = api_client.stats.operations["Metrics"]
+    assert stats.wall_time.count == 1
+    assert stats.network_time.count == 1
+    assert stats.validate_time.count == 1
+    assert stats.response_bytes.total > 0
+    assert api_client.stats.errors == 0
+
+    # Nothing to query without any selected field
+    aioclient_mock.clear_requests()
+    metrics = await api_client.query_metrics(fields=frozenset())
+    assert aioclient_mock.call_count == 0
+    assert metrics.cpu_percent_total is None
+
 
 @pytest.mark.parametrize("api_responses", API_RESPONSES)
 async def test_shares(api_responses: dict, loop: AbstractEventLoop) -> None:
@@ -210,6 +239,19 @@ async def test_disks(api_responses: dict, loop: AbstractEventLoop) -> None:
     assert disks[2].id == "4d5"
     assert disks[2].is_spinning is False
 
+    # Only the selected optional fields are queried
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["disks"],
+        headers={"Content-Type": "application/json"},
+    )
+    await api_client.query_disks(fields=frozenset({"temp"}))
+    query = aioclient_mock.mock_calls[0][2]["query"]
+    assert "temp" in query
+    assert "fsSize" not in query
+    assert "fsFree" not in query
+
 
 @pytest.mark.parametrize("api_responses", API_RESPONSES)
 async def test_array(api_responses: dict, loop: AbstractEventLoop) -> None:
@@ -236,3 +278,428 @@ async def test_array(api_responses: dict, loop: AbstractEventLoop) -> None:
     assert array.capacity_free == 523094720
     assert array.capacity_used == 11474981430
     assert array.capacity_total == 11998076150
+
+
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_vms(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test querying VMs."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["vms"],
+        headers={"Content-Type": "application/json"},
+    )
+    vms = await api_client.query_vms()
+
+    assert vms[0].id == "vm:1"
+    assert vms[0].name == "Windows"
+    assert vms[0].state == VmState.RUNNING
+
+    assert vms[1].id == "vm:2"
+    assert vms[1].name == "Ubuntu"
+    assert vms[1].state == VmState.SHUTDOWN
+
+
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_docker_containers(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test querying Docker containers."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["docker"],
+        headers={"Content-Type": "application/json"},
+    )
+    containers = await api_client.query_docker_containers()
+
+    assert containers[0].id == "container:abc"
+    assert containers[0].name == "plex"
+    assert containers[0].state == DockerState.RUNNING
+    assert containers[0].image == "plexinc/pms-docker:latest"
+    assert containers[0].autostart is True
+
+    assert containers[1].id == "container:def"
+    assert containers[1].name == "container:def"
+    assert containers[1].state == DockerState.EXITED
+    assert containers[1].image == "alpine:latest"
+    assert containers[1].autostart is False
+
+
+@pytest.mark.parametrize(("api_responses"), API_RESPONSES)
+async def test_call_api_single_flight(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test that identical queries share requests and results."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["metrics"],
+        headers={"Content-Type": "application/json"},
+    )
+    # Concurrent queries share one request
+    first, second = await asyncio.gather(api_client.query_metrics(), api_client.query_metrics())
+    assert first == second
+    assert aioclient_mock.call_count == 1
+
+    # Without a result TTL the next query is sent again
+    await api_client.query_metrics()
+    assert aioclient_mock.call_count == 2
+
+    api_client.result_ttl = 60
+    await api_client.query_metrics()
+    await api_client.query_metrics()
+    assert aioclient_mock.call_count == 3
+
+    # Mutations are always sent and invalidate the kept results
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["docker_stop"],
+        headers={"Content-Type": "application/json"},
+    )
+    await asyncio.gather(
+        api_client.docker_stop("container:abc"), api_client.docker_stop("container:abc")
+    )
+    assert aioclient_mock.call_count == 2
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["metrics"],
+        headers={"Content-Type": "application/json"},
+    )
+    await api_client.query_metrics()
+    assert aioclient_mock.call_count == 1
+
+
+async def test_request_scheduler() -> None:
+    """Test that requests are limited and mutations start before waiting queries."""
+    scheduler = RequestScheduler(max_in_flight=1)
+    started = []
+    release = asyncio.Event()
+
+    async def request(name: str, priority: int) -> None:
+        async with scheduler.slot(priority):
+            started.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(request("first", PRIORITY_QUERY))
+    await asyncio.sleep(0)
+    query = asyncio.create_task(request("query", PRIORITY_QUERY))
+    cancelled = asyncio.create_task(request("cancelled", PRIORITY_MUTATION))
+    mutation = asyncio.create_task(request("mutation", PRIORITY_MUTATION))
+    await asyncio.sleep(0)
+    assert started == ["first"]
+    assert scheduler.in_flight == 1
+
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(first, query, mutation)
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert started == ["first", "mutation", "query"]
+    assert scheduler.in_flight == 0
+
+
+async def test_request_scheduler_limit() -> None:
+    """Test that changing the limit starts or holds back waiting requests."""
+    scheduler = RequestScheduler(max_in_flight=1)
+    started = []
+    release = asyncio.Event()
+
+    async def request(name: str) -> None:
+        async with scheduler.slot(PRIORITY_QUERY):
+            started.append(name)
+            await release.wait()
+
+    tasks = [asyncio.create_task(request(str(index))) for index in range(5)]
+    await asyncio.sleep(0)
+    assert started == ["0"]
+
+    scheduler.max_in_flight = 3
+    await asyncio.sleep(0)
+    assert started == ["0", "1", "2"]
+    assert scheduler.in_flight == 3
+
+    # Finished requests do not hand their slots over above a lowered limit
+    scheduler.max_in_flight = 1
+    release.set()
+    await asyncio.sleep(0)
+    assert started == ["0", "1", "2"]
+    assert scheduler.in_flight == 1
+    await asyncio.sleep(0)
+    assert started == ["0", "1", "2", "3"]
+
+    await asyncio.gather(*tasks)
+    assert started == ["0", "1", "2", "3", "4"]
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.parametrize(("api_responses"), API_RESPONSES)
+async def test_docker_stop(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test stopping a Docker container."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["docker_stop"],
+        headers={"Content-Type": "application/json"},
+    )
+    assert await api_client.docker_stop("container:abc") == DockerState.EXITED
+    assert aioclient_mock.mock_calls[0][2]["variables"] == {"id": "container:abc"}
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json={"data": {"docker": {"stop": None}}},
+        headers={"Content-Type": "application/json"},
+    )
+    assert await api_client.docker_stop("container:abc") is None
+
+
+@pytest.mark.parametrize(("api_responses"), API_RESPONSES)
+async def test_docker_stop_many(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test stopping many Docker containers with one request."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["docker_stop_many"],
+        headers={"Content-Type": "application/json"},
+    )
+    assert await api_client.docker_stop_many(["container:abc", "container:def"]) == {
+        "container:abc": DockerState.EXITED,
+        "container:def": None,
+    }
+    assert aioclient_mock.call_count == 1
+    request = aioclient_mock.mock_calls[0][2]
+    assert request["variables"] == {"id0": "container:abc", "id1": "container:def"}
+    assert "item1: stop(id: $id1)" in request["query"]
+
+    # A failed non-null item nulls the results of all items, up to the data
+    error = api_responses["docker_stop_many"]["errors"][0]
+    for data in ({"docker": None}, None):
+        aioclient_mock.clear_requests()
+        aioclient_mock.post(
+            "http://1.2.3.4/graphql",
+            json={"data": data, "errors": [error]},
+            headers={"Content-Type": "application/json"},
+        )
+        assert await api_client.docker_stop_many(["container:abc", "container:def"]) == {
+            "container:abc": DockerState.EXITED,
+            "container:def": None,
+        }
+
+    # An error of the whole mutation fails all items
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json={"data": None, "errors": [{"message": "Docker service unavailable"}]},
+        headers={"Content-Type": "application/json"},
+    )
+    with pytest.raises(UnraidGraphQLError, match="Docker service unavailable"):
+        await api_client.docker_stop_many(["container:abc", "container:def"])
+
+    # Nothing to do without ids
+    aioclient_mock.clear_requests()
+    assert await api_client.docker_stop_many([]) == {}
+    assert aioclient_mock.call_count == 0
+
+
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_combined(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test querying multiple categories with a single request."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["combined"],
+        headers={"Content-Type": "application/json"},
+    )
+    result = await api_client.query_combined(["metrics", "array", "disks", "shares"])
+
+    assert aioclient_mock.call_count == 1
+    query = aioclient_mock.mock_calls[0][2]["query"]
+    assert "metrics: metrics {" in query
+    assert "array: array {" in query
+    assert "disks: array {" in query
+    assert "shares: shares {" in query
+    assert "docker" not in query
+
+    assert set(result) == {"metrics", "array", "disks", "shares"}
+    assert result["metrics"].cpu_percent_total == 5.1
+    assert result["array"].state == ArrayState.STARTED
+    assert result["array"].capacity_total == 11998076150
+    assert [disk.id for disk in result["disks"]] == ["c6b", "8e0", "4d5"]
+    assert result["disks"][2].fs_size is None
+    assert [share.name for share in result["shares"]] == ["Share_1", "Share_2"]
+
+
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_partial_error_response(api_responses: dict, loop: AbstractEventLoop) -> None:
+    """Test a response with errors and partial data."""
+    aioclient_mock = AiohttpClientMocker()
+    session = aioclient_mock.create_session(loop)
+
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json=api_responses["api_version"],
+        headers={"Content-Type": "application/json"},
+    )
+    api_client = await get_api_client("http://1.2.3.4", "test_key", session)
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(
+        "http://1.2.3.4/graphql",
+        json={
+            "errors": [{"message": "Docker service unavailable", "path": ["docker"]}],
+            "data": {
+                "metrics": api_responses["combined"]["data"]["metrics"],
+                "docker": {"containers": [None]},
+            },
+        },
+        headers={"Content-Type": "application/json"},
+    )
+    with pytest.raises(UnraidGraphQLError, match="Docker service unavailable"):
+        await api_client.query_combined(["metrics", "docker"])
+    assert api_client.stats.operations["Combined"].errors == 1
+
+
+def metrics_subscription_handler(
+    api_responses: dict,
+) -> Callable[[web.Request], Awaitable[web.WebSocketResponse]]:
+    """Create a graphql-transport-ws handler streaming metrics, then closing the connection."""
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=("graphql-transport-ws",))
+        await ws.prepare(request)
+
+        init = await ws.receive_json()
+        if init["payload"].get("x-api-key") != "test_key":
+            await ws.close(code=4403)
+            return ws
+        await ws.send_json({"type": "connection_ack"})
+
+        operations = {}
+        for _ in range(2):
+            message = await ws.receive_json()
+            assert message["type"] == "subscribe"
+            query = message["payload"]["query"]
+            operations["cpu" if "systemMetricsCpu" in query else "memory"] = message["id"]
+
+        await ws.send_json(
+            {"id": operations["cpu"], "type": "next", "payload": api_responses["cpu_subscription"]}
+        )
+        await ws.send_json({"type": "ping"})
+        assert (await ws.receive_json()) == {"type": "pong"}
+        await ws.send_json(
+            {
+                "id": operations["memory"],
+                "type": "next",
+                "payload": api_responses["memory_subscription"],
+            }
+        )
+        await ws.send_json(
+            {
+                "id": operations["cpu"],
+                "type": "next",
+                "payload": {"data": {"systemMetricsCpu": {"percentTotal": 42.0}}},
+            }
+        )
+        await ws.close()
+        return ws
+
+    return handler
+
+
+@pytest.mark.usefixtures("socket_enabled")
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_subscribe_metrics(
+    api_responses: dict,
+) -> None:
+    """Test streaming metrics from a graphql-transport-ws server."""
+    app = web.Application()
+    app.router.add_get("/graphql", metrics_subscription_handler(api_responses))
+
+    async with TestServer(app) as server, ClientSession() as session:
+        api_client = UnraidApiV420(str(server.make_url("")), "test_key", session)
+        stream = api_client.subscribe_metrics()
+        first = await anext(stream)
+        second = await anext(stream)
+        with pytest.raises(ClientConnectionError):
+            await anext(stream)
+
+    assert first.cpu_percent_total == 5.1
+    assert first.memory_free == 415510528
+    assert first.memory_percent_total == 76.56870471583932
+    assert second.cpu_percent_total == 42.0
+    assert second.memory_total == 16646950912
+
+
+@pytest.mark.usefixtures("socket_enabled")
+@pytest.mark.parametrize("api_responses", API_RESPONSES)
+async def test_subscribe_metrics_unauthorized(
+    api_responses: dict,
+) -> None:
+    """Test subscription with rejected API key."""
+    app = web.Application()
+    app.router.add_get("/graphql", metrics_subscription_handler(api_responses))
+
+    async with TestServer(app) as server, ClientSession() as session:
+        api_client = UnraidApiV420(str(server.make_url("")), "wrong_key", session)
+        with pytest.raises(UnraidAuthError):
+            await anext(api_client.subscribe_metrics())
@@ -0,0 +1,81 @@
+"""Tests for the diagnostics."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from custom_components.unraid_api.api.instrumentation import DURATION_BUCKETS, Histogram
+from custom_components.unraid_api.diagnostics import async_get_config_entry_diagnostics
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import CONF_API_KEY, CONF_HOST
+from homeassistant.helpers import entity_registry as er
+
+from . import setup_config_entry
+from .const import MOCK_CONFIG_DATA, MOCK_OPTION_DATA
+
+if TYPE_CHECKING:
+    from unittest.mock import AsyncMock
+
+    from homeassistant.core import HomeAssistant
+
+
+def test_histogram() -> None:
+    """Test the buckets and summary of a histogram."""
+    histogram = Histogram(DURATION_BUCKETS)
+    assert histogram.mean is None
+
+    for value in (0.005, 0.01, 0.3, 20):
+        histogram.add(value)
+
+    # Samples count in the first bucket whose upper bound is not below them
+    assert histogram.counts == [2, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+    assert histogram.count == 4
+    assert histogram.maximum == 20
+    assert histogram.last == 20
+    assert histogram.as_dict()["buckets"]["inf"] == 1
+
+
+async def test_diagnostics(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,  # noqa: ARG001
+) -> None:
+    """Test the diagnostics of a config entry."""
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    coordinator = entry.runtime_data.coordinator
+    coordinator.api_stats.operation("query Metrics {}").wall_time.add(0.2)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"][CONF_API_KEY] == REDACTED
+    assert diagnostics["entry"]["data"][CONF_HOST] == REDACTED
+    assert diagnostics["intervals"]["metrics"] == coordinator.interval("metrics")
+    assert diagnostics["update_time"]["count"] == 1
+    assert diagnostics["listener_time"]["count"] >= 1
+    assert diagnostics["requests"]["Metrics"]["wall_time"]["mean"] == 0.2
+
+    # The instrumentation sensors are disabled by default
+    entity_registry = er.async_get(hass)
+    entity = entity_registry.async_get("sensor.test_server_update_duration")
+    assert entity.disabled_by is er.RegistryEntryDisabler.INTEGRATION
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_instrumentation_sensors(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,  # noqa: ARG001
+) -> None:
+    """Test that the instrumentation sensors follow every refresh."""
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    entity_registry = er.async_get(hass)
+    entity_registry.async_update_entity("sensor.test_server_request_errors", disabled_by=None)
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.test_server_request_errors").state == "0"
+
+    # The data is unchanged, only the statistics changed
+    coordinator = entry.runtime_data.coordinator
+    coordinator.api_stats.operation("query Metrics {}").errors += 5
+    await coordinator.async_refresh()
+    assert hass.states.get("sensor.test_server_request_errors").state == "5"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
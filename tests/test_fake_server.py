@@ -0,0 +1,137 @@
+"""End-to-end tests against the local fake Unraid server."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+from custom_components.unraid_api.api import UnraidAuthError, UnraidGraphQLError, get_api_client
+from custom_components.unraid_api.const import CONF_DOCKER, CONF_VMS
+from custom_components.unraid_api.models import DockerState
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_HOST
+
+from . import setup_config_entry
+from .const import MOCK_CONFIG_DATA, MOCK_OPTION_DATA
+from .fake_server import FakeUnraidServer, parse_selection
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+
+def test_parse_selection() -> None:
+    """Test parsing the aliased fields and arguments of a document."""
+    selection = parse_selection(
+        "mutation Bulk($id0: PrefixedID!) {\n  docker {\n    item0: stop(id: $id0) {\n"
+        "      id\n    }\n  }\n}\n"
+    )
+    item = selection["docker"].selection["item0"]
+    assert (item.name, item.variable) == ("stop", "id0")
+    assert list(item.selection) == ["id"]
+
+
+async def test_synthetic_sizes() -> None:
+    """Test querying a large server, with only the selected fields in the response."""
+    fake = FakeUnraidServer(disks=30, shares=40, vms=10, containers=50)
+    async with TestServer(fake.app()) as server, ClientSession() as session:
+        api_client = await get_api_client(str(server.make_url("")), "test_key", session)
+        result = await api_client.query_combined(
+            ["metrics", "array", "disks", "shares", "vms", "docker"],
+            fields={"shares": frozenset({"free"})},
+        )
+
+    # Data disks, one parity and one cache disk
+    assert len(result["disks"]) == 32
+    assert len(result["shares"]) == 40
+    assert result["shares"][0].free is not None
+    assert result["shares"][0].used is None
+    assert len(result["vms"]) == 10
+    assert len(result["docker"]) == 50
+    assert fake.requests == {"ApiVersion": 1, "Combined": 1}
+
+
+async def test_concurrency_limit() -> None:
+    """Test that slow responses queue the requests at the client."""
+    fake = FakeUnraidServer(latency=0.05, jitter=0.02)
+    async with TestServer(fake.app()) as server, ClientSession() as session:
+        api_client = await get_api_client(str(server.make_url("")), "test_key", session)
+        api_client.max_in_flight = 2
+        fake.requests.clear()
+        # Distinct queries, identical ones would share a single request
+        await asyncio.gather(
+            api_client.query_metrics(),
+            api_client.query_array(),
+            api_client.query_disks(),
+            api_client.query_shares(),
+            api_client.query_vms(),
+            api_client.query_docker_containers(),
+        )
+
+    assert fake.max_concurrent == api_client.max_in_flight
+    assert fake.requests.total() == 6
+    assert api_client.stats.operations["Disks"].network_time.mean >= 0.03
+
+
+async def test_errors_and_timeouts() -> None:
+    """Test failing and too slow responses."""
+    fake = FakeUnraidServer()
+    async with TestServer(fake.app()) as server, ClientSession() as session:
+        url = str(server.make_url(""))
+        api_client = await get_api_client(url, "test_key", session)
+
+        fake.error_rate = 1
+        with pytest.raises(UnraidGraphQLError, match="Internal server error"):
+            await api_client.query_array()
+        assert api_client.stats.errors == 1
+
+        fake.error_rate = 0
+        fake.latency = 1
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.05):
+                await api_client.query_array()
+
+        with pytest.raises(UnraidAuthError):
+            await get_api_client(url, "wrong_key", session)
+
+
+async def test_coordinator_end_to_end(hass: HomeAssistant) -> None:
+    """Test the integration against the fake server, recovering from failed updates."""
+    fake = FakeUnraidServer(disks=5, shares=3, vms=2, containers=4, latency=0.01)
+    async with TestServer(fake.app()) as server:
+        entry = await setup_config_entry(
+            hass,
+            data=MOCK_CONFIG_DATA | {CONF_HOST: str(server.make_url("")).rstrip("/")},
+            options=MOCK_OPTION_DATA | {CONF_VMS: True, CONF_DOCKER: True},
+        )
+        assert entry.state is ConfigEntryState.LOADED
+        coordinator = entry.runtime_data.coordinator
+        assert len(coordinator.data["disks"]) == 7
+        assert hass.states.get("sensor.test_server_containers_running").state == "2"
+
+        # A refresh right after the last one reuses its results
+        await coordinator.async_refresh_all()
+        requests = fake.requests.total()
+        await coordinator.async_refresh_all()
+        assert fake.requests.total() == requests
+
+        coordinator.api_client.result_ttl = 0
+        fake.error_rate = 1
+        await coordinator.async_refresh_all()
+        assert not coordinator.last_update_success
+
+        fake.error_rate = 0
+        await coordinator.async_refresh_all()
+        assert coordinator.last_update_success
+
+        await hass.services.async_call(
+            "switch", "turn_on", {"entity_id": "switch.test_server_container_0"}, blocking=True
+        )
+        assert coordinator.data["docker"]["container:0"].state == DockerState.RUNNING
+        assert hass.states.get("sensor.test_server_containers_running").state == "3"
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
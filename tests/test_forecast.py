@@ -0,0 +1,92 @@
+"""Tests for the fill rate forecasts."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
+
+import pytest
+from custom_components.unraid_api.const import DOMAIN
+from custom_components.unraid_api.forecast import (
+    SECONDS_PER_DAY,
+    FillRateEstimator,
+    days_until_full,
+)
+
+from . import setup_config_entry
+from .const import MOCK_CONFIG_DATA, MOCK_OPTION_DATA
+
+if TYPE_CHECKING:
+    from unittest.mock import AsyncMock
+
+    from homeassistant.core import HomeAssistant
+
+
+def test_fill_rate_estimator() -> None:
+    """Test the fill rate of samples added one by one."""
+    estimator = FillRateEstimator()
+    assert estimator.rate() is None
+    assert days_until_full(estimator, 100, 1000) is None
+
+    estimator.add(0, 100)
+    assert estimator.rate() is None
+    for day in range(1, 30):
+        estimator.add(day * SECONDS_PER_DAY, 100 + 10 * day)
+    assert estimator.rate() == pytest.approx(10)
+    assert days_until_full(estimator, 390, 1000) == pytest.approx(61)
+
+    # Recent samples weigh more, the rate follows a change of the fill rate
+    for day in range(30, 90):
+        estimator.add(day * SECONDS_PER_DAY, 390)
+    assert estimator.rate() == pytest.approx(0, abs=0.5)
+
+    # Samples out of order are ignored
+    estimator.add(0, 0)
+    assert estimator.timestamp == 89 * SECONDS_PER_DAY
+    # Freeing space has no end
+    estimator.add(90 * SECONDS_PER_DAY, 0)
+    assert days_until_full(estimator, 0, 1000) is None
+
+
+async def test_array_forecast(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test the days until the array is full, kept across restarts."""
+    now = 1000.0
+    with (
+        patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now),
+        patch("custom_components.unraid_api.coordinator.time", side_effect=lambda: now),
+    ):
+        entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        array = api_client.responses["array"]
+        assert hass.states.get("sensor.test_server_array_days_until_full").state == "unknown"
+
+        for day in range(1, 4):
+            api_client.responses = api_client.responses | {
+                "array": replace(
+                    array,
+                    capacity_used=array.capacity_used + 1000 * day,
+                    capacity_free=array.capacity_free - 1000 * day,
+                )
+            }
+            now += SECONDS_PER_DAY
+            await coordinator.async_refresh()
+
+        state = hass.states.get("sensor.test_server_array_days_until_full")
+        expected = (array.capacity_total - array.capacity_used - 3000) / 1000
+        assert float(state.state) == pytest.approx(expected)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The estimator is saved with the snapshot and restored
+    snapshot = hass_storage[f"{DOMAIN}.{entry.entry_id}"]["data"]
+    assert snapshot["forecasts"]["array"]["array"]["weight"] > 3
+    coordinator = type(coordinator)(hass, entry)
+    await coordinator.async_restore_snapshot()
+    assert coordinator.forecasts["array"]["array"].rate() == pytest.approx(1000)
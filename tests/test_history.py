@@ -0,0 +1,67 @@
+"""Tests for the metric history."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+from custom_components.unraid_api.history import MetricHistory
+
+from . import setup_config_entry
+from .const import MOCK_CONFIG_DATA, MOCK_OPTION_DATA
+
+if TYPE_CHECKING:
+    from unittest.mock import AsyncMock
+
+    from homeassistant.core import HomeAssistant
+
+
+def test_metric_history() -> None:
+    """Test the statistics over the window of the ring buffer."""
+    history = MetricHistory(size=4, window=30)
+    assert history.mean() is None
+    assert history.maximum() is None
+    assert history.percentile(95) is None
+    assert history.rate() is None
+
+    for timestamp, value in ((0, 100), (10, 10), (20, 20), (30, 30), (40, 40)):
+        history.append(timestamp, value)
+
+    # The oldest sample was replaced
+    assert len(history) == 4
+    assert list(history.samples()[1]) == [10, 20, 30, 40]
+    assert history.mean() == 25
+    assert history.maximum() == 40
+    assert history.percentile(50) == 25
+    assert history.percentile(100) == 40
+    assert history.rate() == pytest.approx(60)
+    # The window is extracted once per append
+    assert history.samples() is history.samples()
+
+    # Samples older than the window before the latest sample are left out
+    history.append(70, 40)
+    assert list(history.samples()[0]) == [40, 70]
+    assert history.mean() == 40
+    assert history.rate() == 0
+
+
+async def test_metrics_recorded(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,  # noqa: ARG001
+) -> None:
+    """Test that every metrics update adds a sample."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+        coordinator = entry.runtime_data.coordinator
+        cpu_history = coordinator.metrics_history["cpu_percent_total"]
+        assert len(cpu_history) == 1
+
+        now += 60
+        await coordinator.async_refresh()
+        assert len(cpu_history) == 2
+        assert cpu_history.mean() == coordinator.data["metrics"].cpu_percent_total
+        assert cpu_history.rate() == 0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
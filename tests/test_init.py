@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-from unittest.mock import ANY, AsyncMock, MagicMock
+import asyncio
+import pstats
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
+import pytest
 from aiohttp import ClientConnectionError, ClientConnectorSSLError
 from awesomeversion import AwesomeVersion
 from custom_components.unraid_api.api import (
@@ -12,15 +18,35 @@ from custom_components.unraid_api.api import (
     UnraidAuthError,
     UnraidGraphQLError,
 )
-from custom_components.unraid_api.const import DOMAIN
+from custom_components.unraid_api.const import (
+    CONF_API_VERSION,
+    CONF_ARRAY_INTERVAL,
+    CONF_COMBINED_QUERY,
+    CONF_DOCKER,
+    CONF_LIVE_METRICS,
+    CONF_METRICS_INTERVAL,
+    CONF_SHARES_INTERVAL,
+    DOMAIN,
+    MIN_INTERVAL,
+)
+from custom_components.unraid_api.coordinator import snapshot_store
+from custom_components.unraid_api.models import OPTIONAL_FIELDS, ArrayState, DockerState
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import CONF_API_KEY, CONF_HOST
+from homeassistant.exceptions import (
+    ConfigEntryAuthFailed,
+    HomeAssistantError,
+    ServiceValidationError,
+)
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from . import setup_config_entry
-from .const import MOCK_CONFIG_DATA, MOCK_OPTION_DATA
+from .const import CLIENT_RESPONSES, MOCK_CONFIG_DATA, MOCK_OPTION_DATA
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from custom_components.unraid_api.models import Metrics
     from homeassistant.core import HomeAssistant
 
 
@@ -37,7 +63,9 @@ async def test_load_unload_entry(
         host=MOCK_CONFIG_DATA[CONF_HOST],
         api_key=MOCK_CONFIG_DATA[CONF_API_KEY],
         session=ANY,
+        api_version=None,
     )
+    assert entry.data[CONF_API_VERSION] == "4.20.0"
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
@@ -107,3 +135,729 @@ async def test_load_failure(
     assert entry.state is ConfigEntryState.SETUP_ERROR
     await hass.config_entries.async_unload(entry.entry_id)
     mock_get_api_client.reset_mock()
+
+
+async def test_category_intervals(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that only due categories are queried."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(
+            hass,
+            data=MOCK_CONFIG_DATA,
+            options=MOCK_OPTION_DATA
+            | {CONF_METRICS_INTERVAL: 30, CONF_ARRAY_INTERVAL: 60, CONF_SHARES_INTERVAL: 600},
+        )
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        query_combined = AsyncMock(wraps=api_client.query_combined)
+        api_client.query_combined = query_combined
+
+        assert coordinator.update_interval.total_seconds() == 30
+
+        now += 30
+        await coordinator.async_refresh()
+        query_combined.assert_awaited_once_with(["metrics"], fields=ANY)
+        assert coordinator.data["shares"]["Share_1"].free == 523094721
+        assert coordinator.update_interval.total_seconds() == 30
+
+        query_combined.reset_mock()
+        now += 30
+        await coordinator.async_refresh()
+        query_combined.assert_awaited_once_with(["metrics", "array", "disks"], fields=ANY)
+
+        query_combined.reset_mock()
+        now += 5
+        await coordinator.async_refresh()
+        query_combined.assert_not_awaited()
+        assert coordinator.update_interval.total_seconds() == 25
+
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+        query_combined.assert_awaited_once_with(["metrics", "array", "disks", "shares"], fields=ANY)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_adaptive_intervals(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that polling backs off while unreachable and adapts to the server activity."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(
+            hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_METRICS_INTERVAL: 30}
+        )
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        query_combined = api_client.query_combined
+
+        api_client.query_combined = AsyncMock(side_effect=ClientConnectionError())
+        now += 30
+        await coordinator.async_refresh()
+        assert coordinator.update_interval.total_seconds() == 60
+        now += 60
+        await coordinator.async_refresh()
+        assert coordinator.update_interval.total_seconds() == 120
+
+        # A busy CPU is polled faster, until it settles
+        api_client.query_combined = query_combined
+        metrics = api_client.responses["metrics"]
+        api_client.responses = api_client.responses | {
+            "metrics": replace(metrics, cpu_percent_total=metrics.cpu_percent_total + 50)
+        }
+        now += 120
+        await coordinator.async_refresh()
+        assert coordinator.connection_failures == 0
+        assert coordinator.interval("metrics") == 15
+        assert coordinator.update_interval.total_seconds() == 15
+        now += 15
+        await coordinator.async_refresh()
+        assert coordinator.interval("metrics") == 30
+
+        # The categories of a stopped array are polled less often
+        api_client.responses = api_client.responses | {
+            "array": replace(api_client.responses["array"], state=ArrayState.STOPPED)
+        }
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+        assert coordinator.interval("disks") == 240
+        assert coordinator.interval("shares") == 2400
+        assert coordinator.interval("metrics") == 30
+        # The array state itself is still polled at its interval, to notice a start
+        assert coordinator.interval("array") == 300
+
+        api_client.responses = api_client.responses | {
+            "array": replace(api_client.responses["array"], state=ArrayState.STARTED)
+        }
+        now += 300
+        await coordinator.async_refresh()
+        assert coordinator.interval("disks") == 60
+        assert coordinator.interval("shares") == 600
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_query_pruning(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that queries which can not return changes are skipped."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        query_combined = AsyncMock(wraps=api_client.query_combined)
+        api_client.query_combined = query_combined
+
+        # All disks spun down, their filesystem usage can not change
+        api_client.responses = api_client.responses | {
+            "disks": [replace(disk, is_spinning=False) for disk in api_client.responses["disks"]],
+            "array": replace(api_client.responses["array"], state=ArrayState.STOPPED),
+        }
+        now += 600
+        await coordinator.async_refresh()
+        query_combined.assert_awaited_once_with(["metrics", "array", "disks", "shares"], fields=ANY)
+        # Only the fields of the enabled entities are queried, disk_free is disabled by default
+        fields = query_combined.call_args.kwargs["fields"]
+        assert fields["disks"] == {"temp", "fs_used", "fs_size"}
+        assert fields["metrics"] == OPTIONAL_FIELDS["metrics"]
+
+        query_combined.reset_mock()
+        api_client.responses = api_client.responses | {
+            "disks": [replace(disk, fs_free=None) for disk in api_client.responses["disks"]]
+        }
+        now += 2400
+        await coordinator.async_refresh()
+        # The array is stopped, shares are skipped but stay available
+        query_combined.assert_awaited_once_with(["metrics", "array", "disks"], fields=ANY)
+        assert query_combined.call_args.kwargs["fields"]["disks"] == {"temp"}
+        assert coordinator.data["disks"]["c6b"].fs_free == 464583438
+        assert coordinator.category_available("shares")
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_partial_failure(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that a failing category keeps its last data and does not fail the others."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(
+            hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_COMBINED_QUERY: False}
+        )
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        api_client.query_disks = AsyncMock(side_effect=TimeoutError())
+
+        now += 60
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert coordinator.failed_categories == {"disks"}
+        assert coordinator.last_updated["metrics"] == now
+        assert coordinator.last_updated["disks"] == now - 60
+        assert coordinator.data["disks"]["c6b"].temp == 34
+        assert coordinator.category_available("disks")
+        assert hass.states.get("sensor.test_server_disk1_temperature").state == "34"
+        # The failed category is retried after its interval, not right away
+        assert coordinator.update_interval.total_seconds() > MIN_INTERVAL
+
+        now += 10
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert api_client.query_disks.await_count == 1
+        assert hass.states.get("sensor.test_server_cpu_utilization").state == "5.1"
+
+        # Only the failing category is queried, the other entities stay available
+        coordinator._requested_categories.add("disks")
+        now += 10
+        await coordinator.async_refresh()
+        assert api_client.query_disks.await_count == 2
+        assert coordinator.last_update_success
+        assert hass.states.get("sensor.test_server_cpu_utilization").state == "5.1"
+
+        now += 120
+        await coordinator.async_refresh()
+        assert not coordinator.category_available("disks")
+        assert coordinator.category_available("metrics")
+        assert hass.states.get("sensor.test_server_disk1_temperature").state == "unavailable"
+        assert hass.states.get("sensor.test_server_cpu_utilization").state == "5.1"
+
+        api_client.query_metrics = AsyncMock(side_effect=TimeoutError())
+        api_client.query_array = AsyncMock(side_effect=TimeoutError())
+        now += 300
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+
+        api_client.query_disks = AsyncMock(side_effect=UnraidAuthError({"errors": []}))
+        api_client.query_metrics = AsyncMock(return_value=CLIENT_RESPONSES[0]["metrics"])
+        now += 60
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+        assert isinstance(coordinator.last_exception, ConfigEntryAuthFailed)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_combined_query_fallback(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that categories are queried separately when the combined query fails."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        api_client.query_combined = AsyncMock(
+            side_effect=UnraidGraphQLError({"errors": [{"message": "Docker not running"}]})
+        )
+        api_client.query_shares = AsyncMock(side_effect=UnraidGraphQLError({"errors": []}))
+
+        await coordinator.async_refresh_all()
+        assert coordinator.last_update_success
+        assert coordinator.failed_categories == {"shares"}
+        assert coordinator.data["shares"]["Share_1"].free == 523094721
+        assert api_client.query_combined.await_count == 1
+
+        # The fallback is kept, the combined query is retried after the shortest interval
+        now += 30
+        await coordinator.async_refresh_all()
+        assert api_client.query_combined.await_count == 1
+        now += 30
+        await coordinator.async_refresh_all()
+        assert api_client.query_combined.await_count == 2
+        # Backing off while it keeps failing
+        now += 60
+        await coordinator.async_refresh_all()
+        assert api_client.query_combined.await_count == 2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_changed_listeners(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that only listeners of changed items are updated."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+
+        listeners = {
+            context: MagicMock()
+            for context in (
+                None,
+                ("metrics", None),
+                ("disks", None),
+                ("disks", "c6b"),
+                ("disks", "8e0"),
+            )
+        }
+        for context, listener in listeners.items():
+            coordinator.async_add_listener(listener, context)
+
+        disks = CLIENT_RESPONSES[0]["disks"]
+        api_client.responses = api_client.responses | {
+            "disks": [replace(disks[0], temp=40), *disks[1:]]
+        }
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+
+        assert listeners[None].call_count == 1
+        assert listeners["metrics", None].call_count == 0
+        assert listeners["disks", None].call_count == 1
+        assert listeners["disks", "c6b"].call_count == 1
+        assert listeners["disks", "8e0"].call_count == 0
+
+        api_client.query_combined = AsyncMock(side_effect=TimeoutError())
+        now += 60
+        await coordinator.async_refresh()
+
+        assert listeners["metrics", None].call_count == 1
+        assert listeners["disks", "8e0"].call_count == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_restore_snapshot(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test setup from the snapshot of the last session."""
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    snapshot = hass_storage[f"{DOMAIN}.{entry.entry_id}"]["data"]
+    assert snapshot["server_info"]["name"] == "Test Server"
+    assert snapshot["data"]["disks"]["c6b"]["is_spinning"] is True
+
+    # Entities are created from the snapshot while the server is unreachable
+    mock_get_api_client.reset_mock()
+    started = asyncio.Event()
+
+    async def wait_for_server(*_args: Any, **_kwargs: Any) -> None:
+        started.set()
+        await asyncio.Event().wait()
+
+    mock_get_api_client.side_effect = wait_for_server
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await started.wait()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.test_server_cpu_utilization").state == "5.1"
+    assert hass.states.get("sensor.test_server_disk1_temperature").state == "34"
+    assert hass.states.get("sensor.test_server_share_1_free_space") is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The refresh fails in the background, without failing the setup
+    mock_get_api_client.side_effect = ClientConnectionError()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.test_server_cpu_utilization").state == "unavailable"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_live_metrics_after_snapshot(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that the metrics subscription starts once the restored entry is connected."""
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    api_client = mock_get_api_client.return_value
+    subscribed = asyncio.Event()
+
+    async def subscribe_metrics() -> AsyncGenerator[Metrics]:
+        yield replace(api_client.responses["metrics"], cpu_percent_total=42.0)
+        subscribed.set()
+        await asyncio.Event().wait()
+
+    api_client.subscribe_metrics = subscribe_metrics
+    hass.config_entries.async_update_entry(
+        entry, options=MOCK_OPTION_DATA | {CONF_LIVE_METRICS: True}
+    )
+    # The server answers after the subscription task started
+    mock_get_api_client.reset_mock()
+    connect = asyncio.Event()
+
+    async def connect_later(*_args: Any, **_kwargs: Any) -> MagicMock:
+        await connect.wait()
+        return api_client
+
+    mock_get_api_client.side_effect = connect_later
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    for _ in range(5):
+        await asyncio.sleep(0)
+    connect.set()
+    async with asyncio.timeout(5):
+        await subscribed.wait()
+
+    coordinator = entry.runtime_data.coordinator
+    assert coordinator.metrics_subscribed
+    assert "metrics" not in coordinator._polled_categories()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_live_metrics_reconnect(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that metrics are polled while the subscription is down, until it reconnects."""
+    api_client = mock_get_api_client.return_value
+    query_combined = AsyncMock(wraps=api_client.query_combined)
+    api_client.query_combined = query_combined
+    calls = []
+    retried = asyncio.Event()
+    resume = asyncio.Event()
+    resubscribed = asyncio.Event()
+
+    async def subscribe_metrics() -> AsyncGenerator[Metrics]:
+        calls.append(None)
+        if len(calls) == 2:
+            # A malformed message
+            raise KeyError
+        if len(calls) > 2:
+            retried.set()
+            await resume.wait()
+        yield api_client.responses["metrics"]
+        if len(calls) == 1:
+            raise ClientConnectionError
+        resubscribed.set()
+        await asyncio.Event().wait()
+
+    api_client.subscribe_metrics = subscribe_metrics
+    with patch("custom_components.unraid_api.coordinator.SUBSCRIPTION_RETRY_MIN", 0):
+        entry = await setup_config_entry(
+            hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_LIVE_METRICS: True}
+        )
+        coordinator = entry.runtime_data.coordinator
+        async with asyncio.timeout(5):
+            await retried.wait()
+        # The connection was lost, metrics are polled again right away
+        assert not coordinator.metrics_subscribed
+        assert "metrics" in coordinator._polled_categories()
+        assert query_combined.await_count == 2
+        query_combined.assert_awaited_with(["metrics"], fields=ANY)
+
+        resume.set()
+        async with asyncio.timeout(5):
+            await resubscribed.wait()
+        assert coordinator.metrics_subscribed
+        assert "metrics" not in coordinator._polled_categories()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_streamed_metrics_during_update(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that an update running while metrics are streamed keeps the streamed metrics."""
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    coordinator = entry.runtime_data.coordinator
+    api_client = mock_get_api_client.return_value
+    query_combined = api_client.query_combined
+    streamed = replace(api_client.responses["metrics"], cpu_percent_total=42.0)
+
+    async def query_while_streaming(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        # The subscription starts while the metrics are queried
+        coordinator.metrics_subscribed = True
+        coordinator._async_set_metrics(streamed)
+        return await query_combined(*args, **kwargs)
+
+    api_client.query_combined = AsyncMock(side_effect=query_while_streaming)
+    await coordinator.async_refresh_all()
+
+    assert "metrics" in api_client.query_combined.call_args.args[0]
+    assert coordinator.data["metrics"] is streamed
+    assert hass.states.get("sensor.test_server_cpu_utilization").state == "42.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_cached_api_version(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that the cached API version is used and revalidated after errors."""
+    data = MOCK_CONFIG_DATA | {CONF_API_VERSION: "4.20.0"}
+    entry = await setup_config_entry(hass, data=data, options=MOCK_OPTION_DATA)
+
+    assert entry.state is ConfigEntryState.LOADED
+    mock_get_api_client.assert_called_once_with(
+        host=MOCK_CONFIG_DATA[CONF_HOST],
+        api_key=MOCK_CONFIG_DATA[CONF_API_KEY],
+        session=ANY,
+        api_version=AwesomeVersion("4.20.0"),
+    )
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The server was updated, the cached version is rejected
+    hass.config_entries.async_update_entry(entry, data=data | {CONF_API_VERSION: "4.19.0"})
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    mock_get_api_client.reset_mock()
+    api_client = mock_get_api_client.return_value
+    api_client.query_server_info = AsyncMock(
+        side_effect=[
+            UnraidGraphQLError({"errors": [{"message": "Unknown field"}]}),
+            CLIENT_RESPONSES[0]["server_info"],
+        ]
+    )
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert mock_get_api_client.call_count == 2
+    assert mock_get_api_client.call_args.kwargs["api_version"] is None
+    assert entry.data[CONF_API_VERSION] == "4.20.0"
+
+    # The client returns an empty version for an invalid payload, the cached one is kept
+    coordinator = entry.runtime_data.coordinator
+    api_client.query_combined = AsyncMock(side_effect=UnraidGraphQLError({"errors": []}))
+    api_client.query_shares = AsyncMock(side_effect=UnraidGraphQLError({"errors": []}))
+    api_client.query_api_version = AsyncMock(return_value=AwesomeVersion(""))
+    with patch.object(hass.config_entries, "async_schedule_reload") as schedule_reload:
+        await coordinator.async_refresh_all()
+
+    api_client.query_api_version.assert_awaited_once()
+    schedule_reload.assert_not_called()
+    assert entry.data[CONF_API_VERSION] == "4.20.0"
+
+    # A GraphQL error of a category checks the API version once
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    coordinator._api_version_checked = False
+    api_client.query_api_version = AsyncMock(return_value=AwesomeVersion("4.21.0"))
+    with patch.object(hass.config_entries, "async_schedule_reload") as schedule_reload:
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+        await coordinator.async_refresh()
+
+    api_client.query_api_version.assert_awaited_once()
+    schedule_reload.assert_called_once_with(entry.entry_id)
+    assert entry.data[CONF_API_VERSION] == "4.21.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_docker_action(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that an action updates the container and refreshes only Docker containers."""
+    entry = await setup_config_entry(
+        hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_DOCKER: True}
+    )
+    coordinator = entry.runtime_data.coordinator
+    api_client = mock_get_api_client.return_value
+    # The refresh still returns the old state, the container is stopping
+    api_client.query_combined = AsyncMock(return_value={"docker": CLIENT_RESPONSES[0]["docker"]})
+    plex_listener = MagicMock()
+    other_listener = MagicMock()
+    coordinator.async_add_listener(plex_listener, ("docker", "container:abc"))
+    coordinator.async_add_listener(other_listener, ("docker", "container:def"))
+
+    assert hass.states.get("switch.test_server_plex").state == "on"
+    with patch.object(api_client, "docker_stop", wraps=api_client.docker_stop) as docker_stop:
+        await hass.services.async_call(
+            "switch",
+            "turn_off",
+            {"entity_id": "switch.test_server_plex"},
+            blocking=True,
+        )
+    docker_stop.assert_awaited_once_with("container:abc")
+    api_client.query_combined.assert_awaited_once_with(["docker"], fields={})
+
+    assert plex_listener.call_count == 2
+    assert other_listener.call_count == 0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_discovery_batched(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that the items discovered by an update are passed to the platforms at once."""
+    now = 1000.0
+    with patch("custom_components.unraid_api.coordinator.monotonic", side_effect=lambda: now):
+        entry = await setup_config_entry(
+            hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_DOCKER: True}
+        )
+        coordinator = entry.runtime_data.coordinator
+        api_client = mock_get_api_client.return_value
+        containers = api_client.responses["docker"]
+
+        # Known ids are kept after the item disappeared
+        coordinator.known_docker.add("container:removed")
+        add_callback = MagicMock()
+        coordinator.subscribe_docker(add_callback)
+        add_callback.assert_called_once()
+        assert sorted(add_callback.call_args.args[0], key=lambda item: item.id) == containers
+
+        add_callback.reset_mock()
+        sensors = len(hass.states.async_all("sensor"))
+        switches = len(hass.states.async_all("switch"))
+        new = [replace(container, id=f"{container.id}-new") for container in containers]
+        api_client.responses = api_client.responses | {"docker": containers + new}
+        now += 60
+        await coordinator.async_refresh()
+        add_callback.assert_called_once_with(new)
+        # The entities of the new items read them from the data when they are created
+        await hass.async_block_till_done()
+        assert len(hass.states.async_all("sensor")) > sensors
+        assert len(hass.states.async_all("switch")) == switches + len(new)
+
+        # Nothing new, no callback
+        add_callback.reset_mock()
+        docker = coordinator.data["docker"]
+        now += 60
+        await coordinator.async_refresh()
+        add_callback.assert_not_called()
+        # Unchanged items keep their identity
+        assert coordinator.data["docker"] is docker
+
+        api_client.responses = api_client.responses | {
+            "docker": [replace(containers[0], state=DockerState.EXITED), *containers[1:], *new]
+        }
+        now += 60
+        await coordinator.async_refresh()
+        assert coordinator.data["docker"] is not docker
+        assert coordinator.data["docker"]["container:abc"].state == DockerState.EXITED
+        assert coordinator.data["docker"]["container:def"] is docker["container:def"]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_docker_action_service(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+) -> None:
+    """Test that the service stops a group of containers with one request."""
+    entry = await setup_config_entry(
+        hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA | {CONF_DOCKER: True}
+    )
+    api_client = mock_get_api_client.return_value
+    stopped = [
+        replace(container, state=DockerState.EXITED) for container in api_client.responses["docker"]
+    ]
+    api_client.query_combined = AsyncMock(return_value={"docker": stopped})
+    assert hass.states.get("sensor.test_server_containers_running").state == "1"
+
+    with patch.object(
+        api_client, "docker_stop_many", wraps=api_client.docker_stop_many
+    ) as docker_stop_many:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "docker_action",
+            {
+                "config_entry_id": entry.entry_id,
+                "action": "stop",
+                "containers": ["plex", "container:def"],
+            },
+            blocking=True,
+            return_response=True,
+        )
+    docker_stop_many.assert_awaited_once_with(["container:abc", "container:def"])
+    api_client.query_combined.assert_awaited_once_with(["docker"], fields={})
+    assert response == {"containers": {"container:abc": True, "container:def": True}}
+    assert hass.states.get("switch.test_server_plex").state == "off"
+    # The states are counted again after the update
+    assert hass.states.get("sensor.test_server_containers_running").state == "0"
+    assert entry.runtime_data.coordinator.state_counts("docker") == {DockerState.EXITED: 2}
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "docker_action",
+            {"config_entry_id": entry.entry_id, "action": "stop", "containers": ["unknown"]},
+            blocking=True,
+        )
+
+    # Request errors are reported with a translated message
+    api_client.docker_stop_many = AsyncMock(side_effect=TimeoutError())
+    with pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(
+            DOMAIN,
+            "docker_action",
+            {"config_entry_id": entry.entry_id, "action": "stop", "containers": ["plex"]},
+            blocking=True,
+        )
+    assert exc_info.value.translation_key == "cannot_connect"
+
+    # A rejected API key starts the reauthentication
+    api_client.docker_stop_many = AsyncMock(
+        side_effect=UnraidAuthError({"errors": [{"message": "Unauthorized"}]})
+    )
+    with pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(
+            DOMAIN,
+            "docker_action",
+            {"config_entry_id": entry.entry_id, "action": "stop", "containers": ["plex"]},
+            blocking=True,
+        )
+    assert exc_info.value.translation_key == "auth_failed"
+    await hass.async_block_till_done()
+    flows = hass.config_entries.flow.async_progress_by_handler(DOMAIN)
+    assert [flow["context"]["source"] for flow in flows] == ["reauth"]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "docker_action",
+            {"config_entry_id": entry.entry_id, "action": "stop", "containers": ["plex"]},
+            blocking=True,
+        )
+
+
+async def test_profile_refresh_service(
+    hass: HomeAssistant,
+    mock_get_api_client: AsyncMock,
+    tmp_path: Path,
+) -> None:
+    """Test that the service profiles refresh cycles and writes the statistics."""
+    hass.config.config_dir = str(tmp_path)
+    entry = await setup_config_entry(hass, data=MOCK_CONFIG_DATA, options=MOCK_OPTION_DATA)
+    # Changed data, so the refresh writes the states of the entities
+    api_client = mock_get_api_client.return_value
+    metrics = api_client.responses["metrics"]
+    api_client.responses = api_client.responses | {
+        "metrics": replace(metrics, cpu_percent_total=metrics.cpu_percent_total + 10)
+    }
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "profile_refresh",
+        {"config_entry_id": entry.entry_id, "cycles": 2, "memory": True},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["cycles"] == 2
+    assert Path(response["stats_file"]).parent == tmp_path
+    assert pstats.Stats(response["stats_file"]).total_calls > 0
+    memory_report = await hass.async_add_executor_job(Path(response["memory_file"]).read_text)
+    assert "size=" in memory_report
+    assert any("coordinator.py" in function for function in response["functions"])
+    assert any("async_write_ha_state" in function for function in response["functions"])
+    assert not tracemalloc.is_tracing()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
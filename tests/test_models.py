@@ -0,0 +1,78 @@
+"""Tests for the Unraid models."""
+
+from __future__ import annotations
+
+import json
+import tracemalloc
+from dataclasses import FrozenInstanceError, dataclass
+from typing import Annotated
+
+import pytest
+from custom_components.unraid_api.models import API_CONFIG, DockerContainer, DockerState
+from pydantic import Field, TypeAdapter
+
+CONTAINERS = 1000
+
+
+@dataclass
+class PlainDockerContainer:
+    """Docker container as a plain dataclass, to compare with."""
+
+    __pydantic_config__ = API_CONFIG
+
+    id: str
+    name: Annotated[str, Field(validation_alias="names")]
+    state: DockerState
+    image: str
+    autostart: Annotated[bool, Field(validation_alias="autoStart")]
+
+
+def docker_body(count: int) -> bytes:
+    """Create the containers of a docker query response."""
+    return json.dumps(
+        [
+            {
+                "id": f"container:{index:064x}",
+                "names": f"container_{index}",
+                "state": "RUNNING" if index % 3 else "EXITED",
+                "image": f"registry.example.com/image_{index % 20}:latest",
+                "autoStart": index % 2 == 0,
+            }
+            for index in range(count)
+        ]
+    ).encode()
+
+
+def allocated(model: type, body: bytes) -> int:
+    """Return the memory still allocated by validating the body into a list of the model."""
+    adapter = TypeAdapter(list[model])
+    # The first validation builds caches which are not part of an update
+    adapter.validate_json(body)
+    tracemalloc.start()
+    try:
+        items = adapter.validate_json(body)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(items) == CONTAINERS
+    return size
+
+
+def test_docker_container_memory() -> None:
+    """Test that validated containers take less memory than plain dataclasses."""
+    body = docker_body(CONTAINERS)
+
+    compact = allocated(DockerContainer, body)
+    plain = allocated(PlainDockerContainer, body)
+
+    assert compact < plain * 0.8
+
+
+def test_docker_container_immutable() -> None:
+    """Test that containers are immutable and share their repeated strings."""
+    containers = TypeAdapter(list[DockerContainer]).validate_json(docker_body(40))
+
+    assert not hasattr(containers[0], "__dict__")
+    assert containers[0].image is containers[20].image
+    with pytest.raises(FrozenInstanceError):
+        containers[0].state = DockerState.EXITED